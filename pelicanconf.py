@@ -84,6 +84,7 @@ PLUGINS = [
     "plugins.render_math",
     "plugins.liquid_tags.include_code",
     "plugins.liquid_tags.include_code_collapsible",
+    "plugins.highlight_cache",
     "plugins.goodreads_activity",
     "plugins.goodreads_quotes",
     "plugins.series",
@@ -13,6 +13,8 @@ from os import path
 from bs4 import BeautifulSoup
 from pelican import contents, readers, signals
 
+from ..utils.html_cache import get_soup, set_content
+
 logger = logging.getLogger(__name__)
 
 
@@ -20,7 +22,7 @@ def extract_toc(content):
     if isinstance(content, contents.Static):
         return
 
-    soup = BeautifulSoup(content._content, "html.parser")
+    soup = get_soup(content)
     filename = content.source_path
     extension = path.splitext(filename)[1][1:]
     toc = None
@@ -32,10 +34,9 @@ def extract_toc(content):
         and extension in readers.MarkdownReader.file_extensions
     ):
         toc = soup.find("div", class_="toc")
-        if toc:
-            toc.extract()
-            if len(toc.find_next("ul").find_all("li")) == 0:
-                toc = None
+        # the tree is shared, so only detach the ToC once we know we keep it
+        if toc and len(toc.find("ul").find_all("li")) == 0:
+            toc = None
 
     # default reStructuredText reader
     if (
@@ -70,7 +71,7 @@ def extract_toc(content):
 
     if toc:
         toc.extract()
-        content._content = soup.decode()
+        set_content(content, soup)
         content.toc = toc.decode()
         if content.toc.startswith("<html>"):
             content.toc = content.toc[12:-14]
@@ -1,48 +1,84 @@
 from __future__ import unicode_literals
 
 import logging
+from collections import namedtuple
 
 from pelican import signals
 
+from ..utils.feeds import add_feed_source, fetch_feeds, prefetch_feeds
+
 logger = logging.getLogger(__name__)
 
 _activity_loader = None
 
+Book = namedtuple(
+    "Book",
+    [
+        "title",
+        "author",
+        "link",
+        "l_cover",
+        "m_cover",
+        "s_cover",
+        "description",
+        "rating",
+        "review",
+        "tags",
+    ],
+)
+
 
 class GoodreadsActivity:
     def __init__(self, settings):
-        import feedparser
+        self.settings = settings
+        self.load()
 
-        self.activities = {}
-        activity_feeds = settings["GOODREADS_ACTIVITY_FEED"]
-        for shelf, url in activity_feeds.items():
-            self.activities[shelf] = feedparser.parse(url)
+    def load(self):
+        """Load the shelves' feeds, as fresh as the feed cache allows."""
+        activity_feeds = self.settings["GOODREADS_ACTIVITY_FEED"]
+        feeds = fetch_feeds(activity_feeds.values(), self.settings)
+        self.activities = {shelf: feeds[url] for shelf, url in activity_feeds.items()}
+        self.invalidate()
 
     def fetch(self):
+        """Return the shelves, built once per build and shared by reference."""
+        if self._activity is None:
+            self._activity = self._build_activity()
+        return self._activity
+
+    def invalidate(self):
+        self._activity = None
+
+    def _build_activity(self):
         goodreads_activity = {}
         for shelf, parsed in self.activities.items():
             goodreads_activity[shelf] = {
                 "shelf_title": " ".join(word.capitalize() for word in shelf.split("_")),
-                "books": [],
+                "books": tuple(
+                    Book(
+                        title=entry.title,
+                        author=entry.author_name,
+                        link=entry.link,
+                        l_cover=entry.book_large_image_url,
+                        m_cover=entry.book_medium_image_url,
+                        s_cover=entry.book_small_image_url,
+                        description=entry.book_description,
+                        rating=entry.user_rating,
+                        review=entry.user_review,
+                        tags=entry.user_shelves,
+                    )
+                    for entry in parsed["entries"]
+                ),
             }
-            for entry in parsed["entries"]:
-                book = {
-                    "title": entry.title,
-                    "author": entry.author_name,
-                    "link": entry.link,
-                    "l_cover": entry.book_large_image_url,
-                    "m_cover": entry.book_medium_image_url,
-                    "s_cover": entry.book_small_image_url,
-                    "description": entry.book_description,
-                    "rating": entry.user_rating,
-                    "review": entry.user_review,
-                    "tags": entry.user_shelves,
-                }
-                goodreads_activity[shelf]["books"].append(book)
 
         return goodreads_activity
 
 
+def feed_urls(settings):
+    """Return the URLs of the shelves' feeds."""
+    return list(settings.get("GOODREADS_ACTIVITY_FEED", {}).values())
+
+
 def _get_loader(settings):
     global _activity_loader
 
@@ -68,6 +104,12 @@ def fetch_goodreads_activity(gen, metadata):
         gen.context["goodreads_activity"] = loader.fetch()
 
 
+def reload_goodreads_activity(pelican_obj):
+    """Reload the feeds and rebuild the shelves once in every build."""
+    if _activity_loader is not None:
+        _activity_loader.load()
+
+
 def add_to_jinja_globals(pelican_obj):
     loader = _get_loader(pelican_obj.settings)
     if loader is None:
@@ -82,6 +124,10 @@ def add_to_jinja_globals(pelican_obj):
 
 
 def register():
+    # Fetched with the feeds of the other plugins before the shelves load
+    add_feed_source(feed_urls)
+    signals.initialized.connect(prefetch_feeds)
+    signals.initialized.connect(reload_goodreads_activity)
     signals.initialized.connect(add_to_jinja_globals)
     signals.article_generator_context.connect(fetch_goodreads_activity)
     signals.page_generator_context.connect(fetch_goodreads_activity)
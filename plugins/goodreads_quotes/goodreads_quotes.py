@@ -1,37 +1,62 @@
 from __future__ import unicode_literals
 
 import logging
+from collections import namedtuple
 
 from pelican import signals
 
+from ..utils.feeds import add_feed_source, fetch_feeds, prefetch_feeds
+
 logger = logging.getLogger(__name__)
 
 _quotes_loader = None
 
+Quote = namedtuple("Quote", ["id", "published", "title", "quote", "author"])
+
 
 class GoodreadsQuotes:
     def __init__(self, settings):
-        import feedparser
+        self.settings = settings
+        self.load()
 
-        self.feed = feedparser.parse(settings["GOODREADS_QUOTES"])
+    def load(self):
+        """Load the quotes feed, as fresh as the feed cache allows."""
+        url = self.settings["GOODREADS_QUOTES"]
+        self.feed = fetch_feeds([url], self.settings)[url]
+        self.invalidate()
 
     def fetch(self):
-        goodreads_quotes = {"shelf_title": "Quotes", "quotes": []}
+        """Return the quotes, built once per build and shared by reference."""
+        if self._quotes is None:
+            self._quotes = self._build_quotes()
+        return self._quotes
+
+    def invalidate(self):
+        self._quotes = None
+
+    def _build_quotes(self):
+        quotes = []
         for entry in self.feed["entries"]:
             try:
                 content, author = entry["summary"].split(" -- ", 1)
             except ValueError:
                 content, author = entry["summary"], ""
-            quote = {
-                "id": entry["id"],
-                "published": entry["published_parsed"],
-                "title": entry["title"],
-                "quote": content,
-                "author": ("-- " + author) if author else "",
-            }
-            goodreads_quotes["quotes"].append(quote)
+            quote = Quote(
+                id=entry["id"],
+                published=entry["published_parsed"],
+                title=entry["title"],
+                quote=content,
+                author=("-- " + author) if author else "",
+            )
+            quotes.append(quote)
 
-        return goodreads_quotes
+        return {"shelf_title": "Quotes", "quotes": tuple(quotes)}
+
+
+def feed_urls(settings):
+    """Return the URL of the quotes feed, if any."""
+    url = settings.get("GOODREADS_QUOTES")
+    return [url] if url else []
 
 
 def _get_loader(settings):
@@ -59,6 +84,12 @@ def fetch_goodreads_quotes(gen, metadata):
         gen.context["goodreads_quotes"] = loader.fetch()
 
 
+def reload_goodreads_quotes(pelican_obj):
+    """Reload the feed and rebuild the quotes once in every build."""
+    if _quotes_loader is not None:
+        _quotes_loader.load()
+
+
 def add_to_jinja_globals(pelican_obj):
     loader = _get_loader(pelican_obj.settings)
     if loader is None:
@@ -69,6 +100,10 @@ def add_to_jinja_globals(pelican_obj):
 
 
 def register():
+    # Fetched with the feeds of the other plugins before the quotes load
+    add_feed_source(feed_urls)
+    signals.initialized.connect(prefetch_feeds)
+    signals.initialized.connect(reload_goodreads_quotes)
     signals.initialized.connect(add_to_jinja_globals)
     signals.article_generator_context.connect(fetch_goodreads_quotes)
     signals.page_generator_context.connect(fetch_goodreads_quotes)
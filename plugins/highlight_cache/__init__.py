@@ -0,0 +1 @@
+from .highlight_cache import *  # noqa: F403,PGH004,RUF100
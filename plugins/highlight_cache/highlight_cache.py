@@ -0,0 +1,94 @@
+"""Highlight Cache.
+
+Markdown's codehilite extension runs Pygments over every code block,
+fenced or indented (as produced by ``include_code``), each time a document
+is converted. This plugin memoizes ``CodeHilite.hilite`` on the code, its
+language and the lexer and formatter options, so an unchanged block is
+highlighted once and its HTML reused.
+
+Within a build the results are always shared, so a block repeated across
+articles is highlighted once. With CACHE_CONTENT / LOAD_CONTENT_CACHE
+enabled they are also kept in CACHE_PATH across builds.
+HIGHLIGHT_CACHE_SIZE bounds the number of cached blocks.
+"""
+
+import logging
+
+import markdown
+import pygments
+from markdown.extensions.codehilite import CodeHilite
+from pelican import signals
+
+from ..utils.disk_cache import BoundedDataCacher, hash_key
+
+logger = logging.getLogger(__name__)
+
+HIGHLIGHT_CACHE_SIZE = 2000
+
+_cache = None
+_hilite = CodeHilite.hilite
+
+
+def highlight_key(code, shebang):
+    """Return the cache key of a block, or None if it cannot be cached."""
+    # A formatter class may carry state that is not in the options
+    if not isinstance(code.pygments_formatter, str):
+        return None
+    return hash_key(
+        markdown.__version__,
+        pygments.__version__,
+        code.src,
+        repr(
+            (
+                code.lang,
+                shebang,
+                code.guess_lang,
+                code.use_pygments,
+                code.lang_prefix,
+                code.pygments_formatter,
+                sorted(code.options.items()),
+            )
+        ),
+    )
+
+
+def cached_hilite(self, shebang=True):
+    """``CodeHilite.hilite``, served from the highlight cache when possible."""
+    key = highlight_key(self, shebang) if _cache is not None else None
+    if key is None:
+        return _hilite(self, shebang)
+
+    html = _cache.get_cached_data(key)
+    if html is None:
+        html = _hilite(self, shebang)
+        _cache.cache_data(key, html)
+    return html
+
+
+def open_cache(pelican_obj):
+    global _cache
+    settings = pelican_obj.settings
+    # Shared by the articles of a build even when the cache is not saved
+    _cache = BoundedDataCacher(
+        settings,
+        "highlight",
+        True,
+        settings.get("LOAD_CONTENT_CACHE", False),
+        settings.get("HIGHLIGHT_CACHE_SIZE", HIGHLIGHT_CACHE_SIZE),
+    )
+    CodeHilite.hilite = cached_hilite
+
+
+def save_cache(pelican_obj):
+    global _cache
+    if _cache is None:
+        return
+    if _cache.settings.get("CACHE_CONTENT", False):
+        _cache.save_cache()
+    logger.debug("Highlight cache: %d hits, %d misses", _cache.hits, _cache.misses)
+    _cache = None
+
+
+def register():
+    signals.initialized.connect(open_cache)
+    signals.finalized.connect(save_cache)
@@ -0,0 +1,52 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+
+import markdown
+
+from . import highlight_cache
+
+SOURCE = """Text
+
+```python
+print("hello")
+```
+
+    :::python
+    x = 1
+"""
+
+
+class HighlightCacheTest(unittest.TestCase):
+    def test_blocks_are_highlighted_once(self):
+        expected = markdown.markdown(SOURCE, extensions=["extra", "codehilite"])
+        with TemporaryDirectory() as tmpdirname:
+            settings = {
+                "CACHE_PATH": tmpdirname,
+                "GZIP_CACHE": True,
+                "CACHE_CONTENT": True,
+                "LOAD_CONTENT_CACHE": True,
+            }
+            pelican_obj = SimpleNamespace(settings=settings)
+            highlight_cache.open_cache(pelican_obj)
+            self.addCleanup(highlight_cache.save_cache, pelican_obj)
+            cache = highlight_cache._cache
+
+            for _ in range(2):
+                html = markdown.markdown(SOURCE, extensions=["extra", "codehilite"])
+                self.assertEqual(html, expected)
+            self.assertEqual((cache.hits, cache.misses), (2, 2))
+
+    def test_blocks_are_shared_within_a_build_without_cache_content(self):
+        with TemporaryDirectory() as tmpdirname:
+            settings = {"CACHE_PATH": tmpdirname, "GZIP_CACHE": True}
+            pelican_obj = SimpleNamespace(settings=settings)
+            highlight_cache.open_cache(pelican_obj)
+            cache = highlight_cache._cache
+
+            for _ in range(2):
+                markdown.markdown(SOURCE, extensions=["extra", "codehilite"])
+            self.assertEqual((cache.hits, cache.misses), (2, 2))
+            highlight_cache.save_cache(pelican_obj)
+            self.assertEqual(os.listdir(tmpdirname), [])
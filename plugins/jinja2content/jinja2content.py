@@ -1,91 +1,214 @@
 """jinja2content: Pelican plugin that processes Markdown files as Jinja templates."""
 
 import os
-from tempfile import NamedTemporaryFile
+from io import StringIO
+from itertools import chain
 
-from jinja2 import ChoiceLoader, Environment, FileSystemLoader
+import docutils.core
+import docutils.io
+from jinja2 import ChoiceLoader, Environment, FileSystemBytecodeCache, FileSystemLoader
+from markdown import Markdown
 from pelican import signals
 from pelican.readers import HTMLReader, MarkdownReader, RstReader
-from pelican.utils import pelican_open
+from pelican.utils import mkdir_p, pelican_open
+
+FRONT_MATTER_DELIMITER = "---"
+TRUTHY = {"true", "yes", "on", "1"}
+
+# The settings of the current build and the Jinja environment built from them
+_environment = None
+
+# Whether each source file renders with Jinja, with the modification time
+# and size it was decided for
+_jinja_sources = {}
+
+
+def front_matter_enables_jinja(lines):
+    """Return True when front matter sets ``jinja`` to a truthy value.
+
+    ``lines`` is consumed lazily and only up to the closing delimiter, so
+    the body of the document is never read.
+    """
+    lines = iter(lines)
+    first_line = next(lines, "")
+    if not first_line.startswith(FRONT_MATTER_DELIMITER):
+        return False
+
+    opened = False
+    value = None
+    for raw_line in chain([first_line], lines):
+        raw_line = raw_line.rstrip("\r\n")
+        if raw_line == FRONT_MATTER_DELIMITER:
+            if opened:
+                return value in TRUTHY
+            opened = True
+            continue
+        if not opened or value is not None or ":" not in raw_line:
+            continue
+        key, raw_value = raw_line.split(":", 1)
+        if key.strip().lower() == "jinja":
+            value = raw_value.strip().lower()
+    return False
+
+
+def renders_with_jinja(source_path):
+    """Return True if ``source_path`` asks to be rendered with Jinja.
+
+    The decision is kept until the file's modification time or size changes.
+    """
+    stat = os.stat(source_path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _jinja_sources.get(source_path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    with open(source_path, encoding="utf-8-sig") as fd:
+        decision = front_matter_enables_jinja(fd)
+    _jinja_sources[source_path] = (stamp, decision)
+    return decision
+
+
+def get_environment(settings):
+    """Return the Jinja environment shared by every reader of a build."""
+    global _environment
+    if _environment is None or _environment[0] is not settings:
+        _environment = (settings, create_environment(settings))
+    return _environment[1]
+
+
+def create_environment(settings):
+    # will look first in 'JINJA2CONTENT_TEMPLATES', by default the
+    # content root path, then in the theme's templates
+    local_dirs = settings.get("JINJA2CONTENT_TEMPLATES", ["."])
+    local_dirs = [os.path.join(settings["PATH"], folder) for folder in local_dirs]
+    theme_dir = os.path.join(settings["THEME"], "templates")
+
+    loaders = [FileSystemLoader(_dir) for _dir in local_dirs + [theme_dir]]
+    if "JINJA_ENVIRONMENT" in settings:  # pelican 3.7
+        jinja_environment = dict(settings["JINJA_ENVIRONMENT"])
+    else:
+        jinja_environment = {
+            "trim_blocks": True,
+            "lstrip_blocks": True,
+            "extensions": settings["JINJA_EXTENSIONS"],
+        }
+    # Keep compiled templates between builds
+    if settings.get("JINJA2CONTENT_BYTECODE_CACHE", True):
+        cache_dir = os.path.join(settings.get("CACHE_PATH", "cache"), "jinja2content")
+        mkdir_p(cache_dir)
+        jinja_environment.setdefault(
+            "bytecode_cache", FileSystemBytecodeCache(cache_dir)
+        )
+    env = Environment(loader=ChoiceLoader(loaders), **jinja_environment)
+    if "JINJA_FILTERS" in settings:
+        env.filters.update(settings["JINJA_FILTERS"])
+    if "JINJA_GLOBALS" in settings:
+        env.globals.update(settings["JINJA_GLOBALS"])
+    if "JINJA_TESTS" in settings:
+        env.tests.update(settings["JINJA_TESTS"])
+    return env
+
+
+def compile_template(env, source, filename):
+    """Compile a content template, through the bytecode cache if there is one."""
+    bucket = None
+    code = None
+    if env.bytecode_cache is not None:
+        bucket = env.bytecode_cache.get_bucket(env, filename, filename, source)
+        code = bucket.code
+    if code is None:
+        code = env.compile(source, filename, filename)
+        if bucket is not None:
+            bucket.code = code
+            env.bytecode_cache.set_bucket(bucket)
+    return env.template_class.from_code(env, code, env.make_globals(None))
 
 
 class JinjaContentMixin:
+    """Render sources that ask for it with Jinja before reading them.
+
+    Reader classes using the mixin must provide ``read_text(source_path,
+    text)``, which parses the rendered text as if it had been read from
+    ``source_path`` and returns its content and metadata.
+    """
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-
-        # will look first in 'JINJA2CONTENT_TEMPLATES', by default the
-        # content root path, then in the theme's templates
-        local_dirs = self.settings.get("JINJA2CONTENT_TEMPLATES", ["."])
-        local_dirs = [
-            os.path.join(self.settings["PATH"], folder) for folder in local_dirs
-        ]
-        theme_dir = os.path.join(self.settings["THEME"], "templates")
-
-        loaders = [FileSystemLoader(_dir) for _dir in local_dirs + [theme_dir]]
-        if "JINJA_ENVIRONMENT" in self.settings:  # pelican 3.7
-            jinja_environment = self.settings["JINJA_ENVIRONMENT"]
-        else:
-            jinja_environment = {
-                "trim_blocks": True,
-                "lstrip_blocks": True,
-                "extensions": self.settings["JINJA_EXTENSIONS"],
-            }
-        self.env = Environment(loader=ChoiceLoader(loaders), **jinja_environment)
-        if "JINJA_FILTERS" in self.settings:
-            self.env.filters.update(self.settings["JINJA_FILTERS"])
-        if "JINJA_GLOBALS" in self.settings:
-            self.env.globals.update(self.settings["JINJA_GLOBALS"])
-        if "JINJA_TEST" in self.settings:
-            self.env.tests.update(self.settings["JINJA_TESTS"])
+        self.env = get_environment(self.settings)
 
     def read(self, source_path):
+        if not renders_with_jinja(source_path):
+            return super().read(source_path)
+
         with pelican_open(source_path) as original_text:
-            if not self._should_render_with_jinja(original_text):
-                return super().read(source_path)
-
-            rendered_text = self.env.from_string(original_text).render()
-
-        with NamedTemporaryFile(delete=False) as f:
-            f.write(rendered_text.encode())
-            f.close()
-            content, metadata = super().read(f.name)
-            os.unlink(f.name)
-            return content, metadata
-
-    def _should_render_with_jinja(self, text):
-        """Return True when front matter sets ``jinja`` to a truthy value."""
-        if not text.startswith("---"):
-            return False
-
-        delimiter = "---"
-        lines = text.splitlines()
-        try:
-            start = lines.index(delimiter)
-            end = lines.index(delimiter, start + 1)
-        except ValueError:
-            return False
-
-        for raw_line in lines[start + 1 : end]:
-            if ":" not in raw_line:
-                continue
-            key, value = raw_line.split(":", 1)
-            if key.strip().lower() != "jinja":
-                continue
-            normalized = value.strip().lower()
-            return normalized in {"true", "yes", "on", "1"}
-        return False
+            template = compile_template(self.env, original_text, source_path)
+            rendered_text = template.render()
+
+        return self.read_text(source_path, rendered_text)
 
 
 class JinjaMarkdownReader(JinjaContentMixin, MarkdownReader):
-    pass
+    def read_text(self, source_path, text):
+        self._source_path = source_path
+        self._md = Markdown(**self.settings["MARKDOWN"])
+        content = self._md.convert(text)
+
+        if hasattr(self._md, "Meta"):
+            metadata = self._parse_metadata(self._md.Meta)
+        else:
+            metadata = {}
+        return content, metadata
 
 
 class JinjaRstReader(JinjaContentMixin, RstReader):
-    pass
+    def read_text(self, source_path, text):
+        pub = self._get_text_publisher(source_path, text)
+        parts = pub.writer.parts
+        content = parts.get("body")
+
+        metadata = self._parse_metadata(pub.document, source_path)
+        metadata.setdefault("title", parts.get("title"))
+
+        return content, metadata
+
+    def _get_text_publisher(self, source_path, text):
+        # RstReader._get_publisher, reading from text rather than the file
+        extra_params = {
+            "initial_header_level": "2",
+            "syntax_highlight": "short",
+            "input_encoding": "utf-8",
+            "language_code": self._language_code,
+            "halt_level": 2,
+            "traceback": True,
+            "warning_stream": StringIO(),
+            "embed_stylesheet": False,
+        }
+        user_params = self.settings.get("DOCUTILS_SETTINGS")
+        if user_params:
+            extra_params.update(user_params)
+
+        pub = docutils.core.Publisher(
+            writer=self.writer_class(),
+            source_class=docutils.io.StringInput,
+            destination_class=docutils.io.StringOutput,
+        )
+        pub.set_components("standalone", "restructuredtext", "html")
+        pub.process_programmatic_settings(None, extra_params, None)
+        pub.set_source(source=text, source_path=source_path)
+        pub.publish()
+        return pub
 
 
 class JinjaHTMLReader(JinjaContentMixin, HTMLReader):
-    pass
+    def read_text(self, source_path, text):
+        parser = self._HTMLParser(self.settings, source_path)
+        parser.feed(text)
+        parser.close()
+
+        metadata = {}
+        for k in parser.metadata:
+            metadata[k] = self.process_metadata(k, parser.metadata[k])
+        return parser.body, metadata
 
 
 def add_reader(readers):
@@ -0,0 +1,38 @@
+import os
+import tempfile
+import unittest
+
+from .jinja2content import front_matter_enables_jinja, renders_with_jinja
+
+
+class FrontMatterTest(unittest.TestCase):
+    def test_front_matter_flag(self):
+        cases = {
+            "---\nTitle: A\njinja: true\n---\nbody": True,
+            "---\r\njinja: Yes\r\n---\r\n": True,
+            "---\njinja: false\n---\n": False,
+            "---\njinja: 1\njinja: 0\n---\n": True,
+            "---\njinja: true\n": False,
+            "Title: A\njinja: true\n---\n---\n": False,
+            "---\nTitle: A\n---\njinja: true\n---\n": False,
+            "": False,
+        }
+        for text, expected in cases.items():
+            with self.subTest(text=text):
+                self.assertIs(front_matter_enables_jinja(text.splitlines()), expected)
+
+    def test_body_is_not_consumed(self):
+        lines = iter(["---", "jinja: on", "---", "body"])
+        self.assertTrue(front_matter_enables_jinja(lines))
+        self.assertEqual(list(lines), ["body"])
+
+    def test_decision_follows_file_changes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "page.md")
+            with open(path, "w", encoding="utf-8") as fd:
+                fd.write("---\njinja: true\n---\n")
+            self.assertTrue(renders_with_jinja(path))
+
+            with open(path, "w", encoding="utf-8") as fd:
+                fd.write("---\njinja: false\n---\nlonger\n")
+            self.assertFalse(renders_with_jinja(path))
@@ -0,0 +1,153 @@
+"""
+Code Fragments
+--------------
+Pre-highlighted code bodies served as separate files, for the lazy mode of
+``include_code_collapsible``:
+
+    CODE_COLLAPSIBLE_LAZY = True
+    CODE_FRAGMENT_DIR = 'code-fragments'
+
+Fragments are named by a hash of their HTML and written below the output
+directory when the build finishes. With CACHE_CONTENT / LOAD_CONTENT_CACHE
+enabled they are also kept in CACHE_PATH, so the fragments of articles
+read from the content cache are still written. Only the fragments used by
+the content of a build are written and cached again, so those of deleted
+or edited code blocks are dropped.
+
+Each content object lists the fragments it uses in ``code_fragments``,
+which the theme checks to load the script fetching them.
+"""
+
+import hashlib
+import html
+import logging
+import os
+import re
+
+from markdown.extensions.codehilite import CodeHilite, CodeHiliteExtension
+from pelican.cache import FileDataCacher
+from pelican.utils import mkdir_p
+
+logger = logging.getLogger(__name__)
+
+FRAGMENT_CACHE_NAME = "code-fragments"
+
+# Fragments of the current build, by path relative to the output directory
+_fragments = {}
+# Fragments of the former build, for the blocks that are not rendered again
+_cached_fragments = {}
+
+FRAGMENT_REFERENCE = re.compile(r'data-code-fragment="/([^"]+)"')
+
+# Lists of written content objects of the article and page generators
+CONTENT_LISTS = (
+    "articles",
+    "translations",
+    "drafts",
+    "drafts_translations",
+    "hidden_articles",
+    "pages",
+    "hidden_pages",
+    "hidden_translations",
+    "draft_pages",
+    "draft_translations",
+)
+
+
+def codehilite_config(md):
+    """Return the options of the codehilite extension of ``md``, if any."""
+    for extension in md.registeredExtensions:
+        if isinstance(extension, CodeHiliteExtension):
+            return extension.getConfigs()
+    return None
+
+
+def highlight(md, code, lang):
+    """Highlight code as codehilite does for a Markdown code block."""
+    config = codehilite_config(md)
+    if config is None:
+        return "<pre><code>{}\n</code></pre>\n".format(html.escape(code.rstrip()))
+
+    hiliter = CodeHilite(
+        code.rstrip() + "\n",
+        lang=lang,
+        tab_length=md.tab_length,
+        style=config.pop("pygments_style", "default"),
+        **config,
+    )
+    # A code block without a language may name it in a shebang line
+    return hiliter.hilite(shebang=lang is None)
+
+
+def fragment_path(fragment_dir, body):
+    """Return the output path of the fragment holding ``body``."""
+    name = hashlib.sha1(body.encode("utf-8")).hexdigest()
+    return re.sub("/+", "/", f"{fragment_dir}/{name}.html").lstrip("/")
+
+
+def add_fragment(path, body):
+    _fragments[path] = body
+
+
+def _open_cache(settings, load_policy):
+    return FileDataCacher(
+        settings,
+        FRAGMENT_CACHE_NAME,
+        settings.get("CACHE_CONTENT", False),
+        load_policy,
+    )
+
+
+def load_fragments(pelican_obj):
+    _fragments.clear()
+    _cached_fragments.clear()
+    settings = pelican_obj.settings
+    cache = _open_cache(settings, settings.get("LOAD_CONTENT_CACHE", False))
+    _cached_fragments.update(cache.get_cached_data(FRAGMENT_CACHE_NAME, {}))
+
+
+def list_fragments(content):
+    """Record the fragments ``content`` uses in ``content.code_fragments``.
+
+    The list is kept with content objects read from the content cache.
+    """
+    text = content._content or ""
+    if "data-code-fragment" in text:
+        content.code_fragments = tuple(dict.fromkeys(FRAGMENT_REFERENCE.findall(text)))
+    else:
+        content.code_fragments = ()
+
+
+def collect_fragments(generators):
+    """Register the cached fragments of the content not converted again."""
+    if not _cached_fragments:
+        return
+
+    for generator in generators:
+        for name in CONTENT_LISTS:
+            for content in getattr(generator, name, ()):
+                for fragment in getattr(content, "code_fragments", ()):
+                    if fragment not in _fragments and fragment in _cached_fragments:
+                        _fragments[fragment] = _cached_fragments[fragment]
+
+
+def write_fragments(pelican_obj):
+    if not _fragments and not _cached_fragments:
+        return
+
+    written = 0
+    for path, body in _fragments.items():
+        output_path = os.path.join(pelican_obj.output_path, path)
+        # Names are content hashes, so an existing file is up to date
+        if os.path.exists(output_path):
+            continue
+        mkdir_p(os.path.dirname(output_path))
+        with open(output_path, "w", encoding="utf-8") as fd:
+            fd.write(body)
+        written += 1
+    logger.debug("Wrote %d of %d code fragments", written, len(_fragments))
+
+    cache = _open_cache(pelican_obj.settings, False)
+    cache.cache_data(FRAGMENT_CACHE_NAME, dict(_fragments))
+    cache.save_cache()
+    _cached_fragments.clear()
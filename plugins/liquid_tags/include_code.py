@@ -40,9 +40,9 @@ in the STATIC_PATHS setting, e.g.:
 
 import os
 import re
-import sys
 
 from .mdx_liquid_tags import LiquidTags
+from .snippet_cache import read_code, render_block
 
 SYNTAX = (
     "{% include_code /path/to/code.py [lang:python] [lines:X-Y] "
@@ -105,83 +105,69 @@ def include_code(preprocessor, tag, markup):  # NOQA: C901
     if not codec:
         codec = "utf-8"
 
-    with open(code_path, encoding=codec) as fh:
-        if lines:
-            code = fh.readlines()[first_line - 1 : last_line]
-            code[-1] = code[-1].rstrip()
-            code = "".join(code)
-        else:
-            code = fh.read()
+    def render():
+        if (not title and hide_filename) and not hide_all:
+            raise ValueError(
+                "Either title must be specified or filename must " "be available"
+            )
 
-    if (not title and hide_filename) and not hide_all:
-        raise ValueError(
-            "Either title must be specified or filename must " "be available"
-        )
+        open_tag = "<figure class='code'>\n"
+        close_tag = "</figure>"
 
-    open_tag = "<figure class='code'>\n"
-    close_tag = "</figure>"
+        if not hide_all:
+            open_tag += "<figcaption>"
 
-    if not hide_all:
-        open_tag += "<figcaption>"
+            if title:
+                open_tag += (
+                    '<span class="liquid-tags-code-title">{title}</span>'.format(
+                        title=title.strip()
+                    )
+                )
 
-        if title:
-            open_tag += '<span class="liquid-tags-code-title">{title}</span>'.format(
-                title=title.strip()
-            )
+            if not hide_filename:
+                filename = "%s" % os.path.basename(src)
+                open_tag += (
+                    '<span class="liquid-tags-code-filename">{filename}</span>'.format(
+                        filename=filename.strip()
+                    )
+                )
 
-        if not hide_filename:
-            filename = "%s" % os.path.basename(src)
-            open_tag += (
-                '<span class="liquid-tags-code-filename">{filename}</span>'.format(
-                    filename=filename.strip()
+            if lines:
+                lines_text = " [Lines %s]" % lines
+                open_tag += (
+                    '<span class="liquid-tags-code-lines">{lines}</span>'.format(
+                        lines=lines_text.strip()
+                    )
                 )
-            )
 
-        if lines:
-            lines = " [Lines %s]" % lines
-            open_tag += '<span class="liquid-tags-code-lines">{lines}</span>'.format(
-                lines=lines.strip()
-            )
+            if not hide_link:
+                url = f"/{code_dir}/{src}"
+                url = re.sub("/+", "/", url)
+                open_tag += f"<a href='{url}'>download</a>"
 
-        if not hide_link:
-            url = f"/{code_dir}/{src}"
-            url = re.sub("/+", "/", url)
-            open_tag += f"<a href='{url}'>download</a>"
+            open_tag += "</figcaption>"
 
-        open_tag += "</figcaption>"
+        if lang:
+            lang_include = ":::" + lang + "\n    "
+        else:
+            lang_include = ""
+
+        code = read_code(code_path, codec, lines and (first_line, last_line))
+        code_block = (
+            "\n\n    " + lang_include + "\n    ".join(code.split("\n")) + "\n\n"
+        )
+        return open_tag, code_block, close_tag
+
+    open_tag, code_block, close_tag = render_block(
+        (tag, markup, code_dir), code_path, render
+    )
 
     # store HTML tags in the stash.  This prevents them from being
     # modified by markdown.
     open_tag = preprocessor.configs.htmlStash.store(open_tag)
     close_tag = preprocessor.configs.htmlStash.store(close_tag)
 
-    if lang:
-        lang_include = ":::" + lang + "\n    "
-    else:
-        lang_include = ""
-
-    if sys.version_info[0] < 3:
-        source = (
-            open_tag
-            + "\n\n    "
-            + lang_include
-            + "\n    ".join(code.decode(codec).split("\n"))
-            + "\n\n"
-            + close_tag
-            + "\n"
-        )
-    else:
-        source = (
-            open_tag
-            + "\n\n    "
-            + lang_include
-            + "\n    ".join(code.split("\n"))
-            + "\n\n"
-            + close_tag
-            + "\n"
-        )
-
-    return source
+    return open_tag + code_block + close_tag + "\n"
 
 
 # ----------------------------------------------------------------------
@@ -35,14 +35,31 @@ in the STATIC_PATHS setting, e.g.:
 
     STATIC_PATHS = ['images', 'code']
 
+With ``CODE_COLLAPSIBLE_LAZY = True`` the highlighted code is not inlined in
+the page: it is written to its own file below ``CODE_FRAGMENT_DIR`` and the
+theme fetches it the first time the block is expanded.
+
 [1] https://github.com/imathis/octopress/blob/master/plugins/include_code.rb
 """
 
 import os
 import re
-import sys
 
+from pelican import signals
+
+from . import liquid_tags
+from .code_fragments import (
+    add_fragment,
+    collect_fragments,
+    codehilite_config,
+    fragment_path,
+    highlight,
+    list_fragments,
+    load_fragments,
+    write_fragments,
+)
 from .mdx_liquid_tags import LiquidTags
+from .snippet_cache import read_code, render_block
 
 SYNTAX = (
     "{% include_code /path/to/code.py [lang:python] [lines:X-Y] "
@@ -106,90 +123,109 @@ def include_code_collapsible(preprocessor, tag, markup):  # NOQA: C901
     if not codec:
         codec = "utf-8"
 
-    with open(code_path, encoding=codec) as fh:
-        if lines:
-            code = fh.readlines()[first_line - 1 : last_line]
-            code[-1] = code[-1].rstrip()
-            code = "".join(code)
-        else:
-            code = fh.read()
+    lazy = preprocessor.configs.getConfig("CODE_COLLAPSIBLE_LAZY")
+    fragment_dir = preprocessor.configs.getConfig("CODE_FRAGMENT_DIR")
+    md = preprocessor.md
 
-    if (not title and hide_filename) and not hide_all:
-        raise ValueError(
-            "Either title must be specified or filename must " "be available"
-        )
+    def render():
+        if (not title and hide_filename) and not hide_all:
+            raise ValueError(
+                "Either title must be specified or filename must " "be available"
+            )
 
-    # Start of collapsible block
-    open_tag = "<details>\n<summary>{summary}</summary>\n".format(
-        summary=title or summary
-    )
-    close_tag = "</details>"
+        code = read_code(code_path, codec, lines and (first_line, last_line))
+        fragment = None
+        if lazy:
+            body = highlight(md, code, lang)
+            fragment = fragment_path(fragment_dir, body), body
 
-    open_tag += "<figure class='code'>\n"
-    close_tag = "</figure>\n" + close_tag
+        # Start of collapsible block
+        if fragment:
+            open_tag = '<details data-code-fragment="/{path}">\n'.format(
+                path=fragment[0]
+            )
+        else:
+            open_tag = "<details>\n"
+        open_tag += "<summary>{summary}</summary>\n".format(summary=title or summary)
+        close_tag = "</details>"
 
-    if not hide_all:
-        open_tag += "<figcaption>"
+        open_tag += "<figure class='code'>\n"
+        close_tag = "</figure>\n" + close_tag
 
-        if title:
-            open_tag += '<span class="liquid-tags-code-title">{title}</span>'.format(
-                title=title.strip()
-            )
+        if not hide_all:
+            open_tag += "<figcaption>"
 
-        if not hide_filename:
-            filename = "%s" % os.path.basename(src)
-            open_tag += (
-                '<span class="liquid-tags-code-filename">{filename}</span>'.format(
-                    filename=filename.strip()
+            if title:
+                open_tag += (
+                    '<span class="liquid-tags-code-title">{title}</span>'.format(
+                        title=title.strip()
+                    )
                 )
-            )
 
-        if lines:
-            lines = " [Lines %s]" % lines
-            open_tag += '<span class="liquid-tags-code-lines">{lines}</span>'.format(
-                lines=lines.strip()
-            )
+            if not hide_filename:
+                filename = "%s" % os.path.basename(src)
+                open_tag += (
+                    '<span class="liquid-tags-code-filename">{filename}</span>'.format(
+                        filename=filename.strip()
+                    )
+                )
+
+            if lines:
+                lines_text = " [Lines %s]" % lines
+                open_tag += (
+                    '<span class="liquid-tags-code-lines">{lines}</span>'.format(
+                        lines=lines_text.strip()
+                    )
+                )
+
+            if not hide_link:
+                url = f"/{code_dir}/{src}"
+                url = re.sub("/+", "/", url)
+                open_tag += f"<a href='{url}'>download</a>"
 
-        if not hide_link:
-            url = f"/{code_dir}/{src}"
-            url = re.sub("/+", "/", url)
-            open_tag += f"<a href='{url}'>download</a>"
+            open_tag += "</figcaption>"
 
-        open_tag += "</figcaption>"
+        if fragment:
+            placeholder = '<div class="code-fragment-body"></div>\n'
+            return open_tag, placeholder, close_tag, fragment
+
+        if lang:
+            lang_include = ":::" + lang + "\n    "
+        else:
+            lang_include = ""
+
+        code_block = (
+            "\n\n    " + lang_include + "\n    ".join(code.split("\n")) + "\n\n"
+        )
+        return open_tag, code_block, close_tag, fragment
+
+    # The highlighted fragment depends on the codehilite options
+    options = (tag, markup, code_dir, lazy, fragment_dir)
+    if lazy:
+        options += (repr(sorted((codehilite_config(md) or {}).items())),)
+    open_tag, code_block, close_tag, fragment = render_block(
+        options, code_path, render
+    )
+
+    if fragment:
+        # Registered on every use, as the block itself may come from the cache
+        add_fragment(*fragment)
+        # The whole block is HTML, kept from markdown in one stash entry
+        block = preprocessor.configs.htmlStash.store(open_tag + code_block + close_tag)
+        return block + "\n"
 
     # store HTML tags in the stash. This prevents them from being modified by markdown.
     open_tag = preprocessor.configs.htmlStash.store(open_tag)
     close_tag = preprocessor.configs.htmlStash.store(close_tag)
 
-    if lang:
-        lang_include = ":::" + lang + "\n    "
-    else:
-        lang_include = ""
-
-    if sys.version_info[0] < 3:
-        source = (
-            open_tag
-            + "\n\n    "
-            + lang_include
-            + "\n    ".join(code.decode(codec).split("\n"))
-            + "\n\n"
-            + close_tag
-            + "\n"
-        )
-    else:
-        source = (
-            open_tag
-            + "\n\n    "
-            + lang_include
-            + "\n    ".join(code.split("\n"))
-            + "\n\n"
-            + close_tag
-            + "\n"
-        )
-
-    return source
+    return open_tag + code_block + close_tag + "\n"
 
 
 # ----------------------------------------------------------------------
-# This import allows include_code tag to be a Pelican plugin
-from .liquid_tags import register  # noqa
+# This allows include_code_collapsible tag to be a Pelican plugin
+def register():
+    liquid_tags.register()
+    signals.initialized.connect(load_fragments)
+    signals.content_object_init.connect(list_fragments)
+    signals.all_generators_finalized.connect(collect_fragments)
+    signals.finalized.connect(write_fragments)
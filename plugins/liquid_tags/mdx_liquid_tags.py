@@ -10,7 +10,6 @@ These result in a preprocess step within markdown that produces
 either markdown or html.
 """
 
-import itertools
 import re
 import warnings
 
@@ -21,6 +20,8 @@ LIQUID_TAG = re.compile(r"\{%.*?%\}", re.MULTILINE | re.DOTALL)
 EXTRACT_TAG = re.compile(r"(?:\s*)(\S+)(?:\s*)")
 LT_CONFIG = {
     "CODE_DIR": "code",
+    "CODE_COLLAPSIBLE_LAZY": False,
+    "CODE_FRAGMENT_DIR": "code-fragments",
     "NOTEBOOK_DIR": "notebooks",
     "FLICKR_API_KEY": "flickr",
     "GIPHY_API_KEY": "giphy",
@@ -31,6 +32,8 @@ LT_CONFIG = {
 }
 LT_HELP = {
     "CODE_DIR": "Code directory for include_code subplugin",
+    "CODE_COLLAPSIBLE_LAZY": "Load include_code_collapsible bodies on expand",
+    "CODE_FRAGMENT_DIR": "Output directory of lazily loaded code bodies",
     "NOTEBOOK_DIR": "Notebook directory for notebook subplugin",
     "FLICKR_API_KEY": "Flickr key for accessing the API",
     "GIPHY_API_KEY": "Giphy key for accessing the API",
@@ -44,29 +47,34 @@ LT_HELP = {
 class _LiquidTagsPreprocessor(markdown.preprocessors.Preprocessor):
     _tags = {}
 
-    def __init__(self, configs):
+    def __init__(self, configs, md=None):
+        super().__init__(md)
         self.configs = configs
 
     def run(self, lines):
         page = "\n".join(lines)
-        liquid_tags = LIQUID_TAG.findall(page)
+        # Most documents have no tags at all
+        if "{%" not in page:
+            return lines
 
-        for i, markup in enumerate(liquid_tags):
+        parts = []
+        position = 0
+        for liquid_tag in LIQUID_TAG.finditer(page):
             # remove {% %}
-            markup = markup[2:-2]
-            tag = EXTRACT_TAG.match(markup).groups()[0]
-            markup = EXTRACT_TAG.sub("", markup, 1)
+            markup = liquid_tag.group()[2:-2]
+            extracted = EXTRACT_TAG.match(markup)
+            tag = extracted.group(1)
+            parts.append(page[position : liquid_tag.start()])
             if tag in self._tags:
-                liquid_tags[i] = self._tags[tag](self, tag, markup.strip())
-
-        # add an empty string to liquid_tags so that chaining works
-        liquid_tags.append("")
-
-        # reconstruct string
-        page = "".join(itertools.chain(*zip(LIQUID_TAG.split(page), liquid_tags)))
+                markup = markup[extracted.end() :]
+                parts.append(self._tags[tag](self, tag, markup.strip()))
+            else:
+                parts.append(liquid_tag.group())
+            position = liquid_tag.end()
+        parts.append(page[position:])
 
         # resplit the lines
-        return page.split("\n")
+        return "".join(parts).split("\n")
 
 
 class LiquidTags(markdown.Extension):
@@ -98,7 +106,11 @@ class LiquidTags(markdown.Extension):
         # within equations will not be parsed as an include.
         i = md.preprocessors.get_index_for_name("html_block")
         priority = md.preprocessors._priority[i].priority - 5
-        md.preprocessors.register(_LiquidTagsPreprocessor(self), "mdincludes", priority)
+        # The extension is kept in the settings, pickled with the content
+        # cache, so the Markdown instance is only held by the preprocessor
+        md.preprocessors.register(
+            _LiquidTagsPreprocessor(self, md), "mdincludes", priority
+        )
 
 
 def makeExtension(configs=None):
@@ -0,0 +1,121 @@
+"""
+Snippet Cache
+-------------
+An in-memory cache shared by the ``include_code`` tags.
+
+Entries are keyed by the included file's path, modification time and size,
+so an edited file is read again while unchanged ones are served from memory
+across articles and, in a long-running process such as ``invoke
+livereload``, across builds. Three kinds of entries are kept: the decoded
+text of a file (or of a line range of it), the HTML generated for a tag and
+a sparse line index of each file included by line range.
+"""
+
+import os
+from collections import OrderedDict
+from itertools import count, islice
+
+SNIPPET_CACHE_SIZE = 256
+# Lines between two positions of the line index
+LINE_INDEX_STRIDE = 256
+
+
+class SnippetCache:
+    """Least recently used cache of computed values."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key, compute):
+        """Return the value for ``key``, calling ``compute`` on a miss."""
+        try:
+            self._entries.move_to_end(key)
+        except KeyError:
+            self.misses += 1
+            value = self._entries[key] = compute()
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return value
+
+        self.hits += 1
+        return self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
+
+
+snippets = SnippetCache(SNIPPET_CACHE_SIZE)
+
+
+def file_stamp(path):
+    """Identify the current version of a file."""
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+
+
+def read_code(code_path, codec, line_range=None):
+    """Return the decoded text of a file, or of its ``(first, last)`` lines.
+
+    A line range is returned without its trailing whitespace.
+    """
+    key = ("code", file_stamp(code_path), codec, line_range)
+    return snippets.get(key, lambda: _read_code(code_path, codec, line_range))
+
+
+def _read_code(code_path, codec, line_range):
+    if line_range:
+        code = read_lines(code_path, codec, *line_range)
+        code[-1] = code[-1].rstrip()
+        return "".join(code)
+    with open(code_path, encoding=codec) as fh:
+        return fh.read()
+
+
+def read_lines(code_path, codec, first_line, last_line):
+    """Return lines ``first_line`` to ``last_line`` (1-based, inclusive).
+
+    The file is entered at the indexed position nearest to the first line
+    and only the requested lines are read, so memory does not grow with
+    the size of the file.
+    """
+    start = max(first_line - 1, 0)
+    positions = line_index(code_path, codec)
+    checkpoint = start // LINE_INDEX_STRIDE
+    if checkpoint >= len(positions):
+        return []
+
+    with open(code_path, encoding=codec) as fh:
+        fh.seek(positions[checkpoint])
+        skip = start - checkpoint * LINE_INDEX_STRIDE
+        return list(islice(fh, skip, skip + max(last_line - start, 0)))
+
+
+def line_index(code_path, codec):
+    """Return the position of every ``LINE_INDEX_STRIDE``-th line of a file."""
+    key = ("lines", file_stamp(code_path), codec)
+    return snippets.get(key, lambda: _index_lines(code_path, codec))
+
+
+def _index_lines(code_path, codec):
+    # Text positions rather than byte offsets, so that any codec and
+    # universal newlines split lines exactly as reading the file does
+    positions = []
+    with open(code_path, encoding=codec) as fh:
+        for line_number in count():
+            if line_number % LINE_INDEX_STRIDE == 0:
+                positions.append(fh.tell())
+            if not fh.readline():
+                break
+    return positions
+
+
+def render_block(options, code_path, render):
+    """Return the HTML ``render`` generates for a tag, cached per file version.
+
+    ``options`` holds everything besides the file the HTML depends on.
+    """
+    key = ("block", options, file_stamp(code_path))
+    return snippets.get(key, render)
@@ -0,0 +1,82 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+
+import markdown
+
+from . import code_fragments
+from .code_fragments import (
+    collect_fragments,
+    fragment_path,
+    highlight,
+    list_fragments,
+    load_fragments,
+    write_fragments,
+)
+
+
+class CodeFragmentsTest(unittest.TestCase):
+    def test_highlight_matches_codehilite(self):
+        md = markdown.Markdown(
+            extensions=["codehilite"],
+            extension_configs={"codehilite": {"css_class": "highlight"}},
+        )
+        code = "def f():\n    return 1\n"
+        expected = md.convert("    :::python\n    " + code.replace("\n", "\n    "))
+        self.assertEqual(highlight(md, code, "python").strip(), expected)
+
+    def test_fragments_are_written_once(self):
+        body = "<pre><code>x = 1\n</code></pre>\n"
+        path = fragment_path("/code-fragments/", body)
+        self.assertRegex(path, r"^code-fragments/[0-9a-f]{40}\.html$")
+
+        with TemporaryDirectory() as tmpdirname:
+            settings = {"CACHE_PATH": tmpdirname, "GZIP_CACHE": True}
+            pelican_obj = SimpleNamespace(output_path=tmpdirname, settings=settings)
+            code_fragments._fragments.clear()
+            code_fragments.add_fragment(path, body)
+            write_fragments(pelican_obj)
+            with open(os.path.join(tmpdirname, path), encoding="utf-8") as fd:
+                self.assertEqual(fd.read(), body)
+        code_fragments._fragments.clear()
+
+    def test_stale_fragments_are_dropped(self):
+        kept, stale = (f"<pre><code>{name}\n</code></pre>\n" for name in "ab")
+        kept_path = fragment_path("code-fragments", kept)
+        stale_path = fragment_path("code-fragments", stale)
+
+        with TemporaryDirectory() as tmpdirname:
+            settings = {
+                "CACHE_PATH": os.path.join(tmpdirname, "cache"),
+                "GZIP_CACHE": True,
+                "CACHE_CONTENT": True,
+                "LOAD_CONTENT_CACHE": True,
+            }
+            pelican_obj = SimpleNamespace(
+                output_path=os.path.join(tmpdirname, "output"), settings=settings
+            )
+            load_fragments(pelican_obj)
+            code_fragments.add_fragment(kept_path, kept)
+            code_fragments.add_fragment(stale_path, stale)
+            write_fragments(pelican_obj)
+
+            # The next build reads the article using the kept fragment from
+            # the content cache and no longer has the stale one
+            load_fragments(pelican_obj)
+            article = SimpleNamespace(
+                _content=f'<details data-code-fragment="/{kept_path}">'
+            )
+            list_fragments(article)
+            self.assertEqual(article.code_fragments, (kept_path,))
+            collect_fragments([SimpleNamespace(articles=[article])])
+            write_fragments(pelican_obj)
+
+            load_fragments(pelican_obj)
+            self.assertEqual(code_fragments._cached_fragments, {kept_path: kept})
+        code_fragments._fragments.clear()
+        code_fragments._cached_fragments.clear()
+
+
+if __name__ == "__main__":
+    unittest.main()
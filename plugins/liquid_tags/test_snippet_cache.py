@@ -0,0 +1,54 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from . import snippet_cache
+from .snippet_cache import SnippetCache, read_code, read_lines, snippets
+
+
+class SnippetCacheTest(unittest.TestCase):
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = SnippetCache(2)
+        cache.get("a", lambda: 1)
+        cache.get("b", lambda: 2)
+        cache.get("a", lambda: None)
+        cache.get("c", lambda: 3)
+        self.assertEqual(cache.get("a", lambda: None), 1)
+        self.assertIsNone(cache.get("b", lambda: None))
+        self.assertEqual((cache.hits, cache.misses), (2, 4))
+
+    def test_read_code_follows_file_changes(self):
+        with TemporaryDirectory() as tmpdirname:
+            path = os.path.join(tmpdirname, "script.py")
+            with open(path, "w", encoding="utf-8") as fd:
+                fd.write("a = 1\nb = 2  \nc = 3\n")
+            self.assertEqual(read_code(path, "utf-8", (2, 2)), "b = 2")
+
+            hits = snippets.hits
+            self.assertEqual(read_code(path, "utf-8"), "a = 1\nb = 2  \nc = 3\n")
+            self.assertEqual(read_code(path, "utf-8"), "a = 1\nb = 2  \nc = 3\n")
+            self.assertEqual(snippets.hits, hits + 1)
+
+            with open(path, "w", encoding="utf-8") as fd:
+                fd.write("changed\n")
+            self.assertEqual(read_code(path, "utf-8"), "changed\n")
+
+    @mock.patch.object(snippet_cache, "LINE_INDEX_STRIDE", 4)
+    def test_read_lines_matches_readlines(self):
+        with TemporaryDirectory() as tmpdirname:
+            newlines = [("utf-8", "\n"), ("utf-8", "\r"), ("utf-16", "\r\n")]
+            for codec, newline in newlines:
+                path = os.path.join(tmpdirname, f"{codec}{len(newline)}.txt")
+                with open(path, "w", encoding=codec, newline="") as fd:
+                    fd.write(newline.join(f"line {i} é" for i in range(1, 11)))
+                with open(path, encoding=codec) as fd:
+                    lines = fd.readlines()
+
+                ranges = [(1, 1), (3, 9), (4, 5), (5, 12), (11, 12)]
+                for first_line, last_line in ranges:
+                    with self.subTest(codec=codec, first_line=first_line):
+                        self.assertEqual(
+                            read_lines(path, codec, first_line, last_line),
+                            lines[first_line - 1 : last_line],
+                        )
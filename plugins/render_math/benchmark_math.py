@@ -0,0 +1,228 @@
+"""Benchmark of the math delimiter scanner on the math-heavy articles.
+
+Converts every article containing math with the delimiter scanner of
+``PelicanMathJaxExtension`` and with the original regular expressions, kept
+below as a reference, checks that both produce the same HTML and reports
+the Markdown conversion times. A synthetic paragraph full of unmatched
+``$`` signs shows the backtracking of the original patterns.
+
+The display math correction is timed separately, against its original
+implementation, on a synthetic derivation with thousands of equations.
+
+Run from the repository root::
+
+    python -m plugins.render_math.benchmark_math [ARTICLE_COUNT]
+"""
+
+import copy
+import sys
+import timeit
+from pathlib import Path
+from xml.etree.ElementTree import Element, SubElement, tostring
+
+import markdown
+from markdown.util import AtomicString
+
+from .pelican_mathjax_markdown_extension import (
+    PelicanMathJaxCorrectDisplayMath,
+    PelicanMathJaxExtension,
+)
+
+ARTICLES_DIR = Path("content") / "articles"
+REPEAT = 5
+CONFIG = {"mathjax_script": "", "math_tag_class": "math", "auto_insert": False}
+
+
+class ReferenceMathJaxPattern(markdown.inlinepatterns.Pattern):
+    """Math pattern as originally matched, by one regular expression."""
+
+    def __init__(self, pelican_mathjax_extension, tag, pattern):
+        super().__init__(pattern)
+        self.pelican_mathjax_extension = pelican_mathjax_extension
+        self.tag = tag
+
+    def handleMatch(self, m):
+        node = Element(self.tag)
+        node.set("class", "math")
+
+        prefix = "\\(" if m.group("prefix") == "$" else m.group("prefix")
+        suffix = "\\)" if m.group("suffix") == "$" else m.group("suffix")
+        node.text = AtomicString(prefix + m.group("math") + suffix)
+        self.pelican_mathjax_extension.mathjax_needed = True
+        return node
+
+
+class ReferenceMathJaxExtension(PelicanMathJaxExtension):
+    """The extension with its original patterns."""
+
+    def extendMarkdown(self, md):
+        mathjax_inline_regex = r"(?P<prefix>\$)(?P<math>.+?)(?P<suffix>(?<!\s)\2)"
+        mathjax_display_regex = (
+            r"(?P<prefix>\$\$|\\begin\{(.+?)\})(?P<math>.+?)(?P<suffix>\2|\\end\{\3\})"
+        )
+        md.inlinePatterns.register(
+            ReferenceMathJaxPattern(self, "div", mathjax_display_regex),
+            "mathjax_displayed",
+            186,
+        )
+        md.inlinePatterns.register(
+            ReferenceMathJaxPattern(self, "span", mathjax_inline_regex),
+            "mathjax_inlined",
+            185,
+        )
+        md.treeprocessors.register(
+            PelicanMathJaxCorrectDisplayMath(self), "mathjax_correctdisplayedmath", 15
+        )
+
+
+class ReferenceCorrectDisplayMath(PelicanMathJaxCorrectDisplayMath):
+    """Display math correction as originally done, by inserting into the root."""
+
+    def correct_html(self, root, children, div_math, insert_idx, text):
+        current_idx = 0
+
+        for idx in div_math:
+            el = Element("p")
+            el.text = text
+            el.extend(children[current_idx:idx])
+
+            if len(el) != 0 or (el.text and not el.text.isspace()):
+                root.insert(insert_idx, el)
+                insert_idx += 1
+
+            text = children[idx].tail
+            children[idx].tail = None
+            root.insert(insert_idx, children[idx])
+            insert_idx += 1
+            current_idx = idx + 1
+
+        el = Element("p")
+        el.text = text
+        el.extend(children[current_idx:])
+
+        if len(el) != 0 or (el.text and not el.text.isspace()):
+            root.insert(insert_idx, el)
+
+    def run(self, root):
+        for parent in root:
+            div_math = []
+            children = list(parent)
+
+            for div in parent.findall("div"):
+                if div.get("class") == "math":
+                    div_math.append(children.index(div))
+
+            if not div_math:
+                continue
+
+            insert_idx = list(root).index(parent)
+            self.correct_html(root, children, div_math, insert_idx, parent.text)
+            root.remove(parent)
+
+        return root
+
+
+def derivation(paragraphs):
+    """Return a tree of paragraphs mixing text, inline and display math."""
+    root = Element("div")
+    for i in range(paragraphs):
+        paragraph = SubElement(root, "p")
+        paragraph.text = f"Step {i}: with "
+        for j in range(3):
+            span = SubElement(paragraph, "span", {"class": "math"})
+            span.text = f"\\(a_{j}\\)"
+            span.tail = " we get"
+            div = SubElement(paragraph, "div", {"class": "math"})
+            div.text = f"$$u_{{{i}}} = a_{j} u_{{xx}}$$"
+            div.tail = " and so on" if j < 2 else None
+    return root
+
+
+def compare_correction(paragraphs):
+    tree = derivation(paragraphs)
+    extension = PelicanMathJaxExtension(dict(CONFIG))
+    reference = ReferenceCorrectDisplayMath(extension)
+    correction = PelicanMathJaxCorrectDisplayMath(extension)
+
+    expected = tostring(reference.run(copy.deepcopy(tree)))
+    assert tostring(correction.run(copy.deepcopy(tree))) == expected
+
+    def best_run(processor):
+        trees = [copy.deepcopy(tree) for _ in range(REPEAT)]
+        return best_time(lambda: processor.run(trees.pop()))
+
+    before = best_run(reference)
+    after = best_run(correction)
+    print(
+        f"display math correction, {paragraphs * 3} equations: "
+        f"reference {before:.2f} ms, single pass {after:.2f} ms "
+        f"({before / after:.1f}x)"
+    )
+
+
+def math_articles(count):
+    """Return ``(name, source)`` of the ``count`` articles with the most ``$``."""
+    articles = [
+        (path.name, path.read_text(encoding="utf-8"))
+        for path in ARTICLES_DIR.glob("*.md")
+    ]
+    articles.sort(key=lambda article: article[1].count("$"), reverse=True)
+    return [article for article in articles[:count] if "$" in article[1]]
+
+
+def converter(extension_class):
+    """Return a function converting Markdown as Pelican does for articles."""
+    md = markdown.Markdown(
+        extensions=[
+            "markdown.extensions.codehilite",
+            "markdown.extensions.extra",
+            "markdown.extensions.meta",
+            extension_class(dict(CONFIG)),
+        ]
+    )
+
+    def convert(source):
+        md.reset()
+        return md.convert(source)
+
+    return convert
+
+
+def best_time(func):
+    """Return the best of ``REPEAT`` runs of ``func``, in milliseconds."""
+    return min(timeit.repeat(func, number=1, repeat=REPEAT)) * 1000
+
+
+def compare(name, source, reference, scanner):
+    expected = reference(source)
+    assert scanner(source) == expected, name
+    before = best_time(lambda: reference(source))
+    after = best_time(lambda: scanner(source))
+    print(
+        f"{name}: {source.count('$')} '$' in {len(source)} chars, "
+        f"regex {before:.2f} ms, scanner {after:.2f} ms ({before / after:.1f}x)"
+    )
+    return before, after
+
+
+def main(count=10):
+    reference = converter(ReferenceMathJaxExtension)
+    scanner = converter(PelicanMathJaxExtension)
+
+    total_before = total_after = 0
+    for name, source in math_articles(count):
+        before, after = compare(name, source, reference, scanner)
+        total_before += before
+        total_after += after
+    print(f"total: regex {total_before:.2f} ms, scanner {total_after:.2f} ms")
+
+    # Prices and shell variables: "$" signs that never close a formula
+    paragraph = " ".join(f"costs $ {i} or ${{HOME}} $" for i in range(300))
+    compare("unclosed '$' paragraph", paragraph, reference, scanner)
+
+    for paragraphs in (100, 1000, 3000):
+        compare_correction(paragraphs)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
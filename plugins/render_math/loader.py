@@ -0,0 +1,102 @@
+"""Per-page MathJax loader of the render_math plugin.
+
+With ``MATH_JAX = {"loader": True}``, content and summaries with math carry
+a placeholder script instead of the whole MathJax configuration. When a
+page is written, its first placeholder becomes a small loader and the
+others are dropped, so an index listing several summaries with math loads
+MathJax once. The loader fetches the configuration, written once to
+``CONFIG_PATH``, only when some math scrolls into view.
+"""
+
+import json
+import logging
+import os
+import re
+
+from pelican.utils import mkdir_p
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER = "/* render_math: MathJax loader */"
+PLACEHOLDER_SCRIPT = re.compile(
+    r"<script[^>]*>\s*" + re.escape(PLACEHOLDER) + r"\s*</script>"
+)
+CONFIG_PATH = "theme/js/mathjax-config.js"
+
+LOADER_SCRIPT = """<script type="text/javascript">
+(function () {{
+    function load() {{
+        var script = document.createElement("script");
+        script.src = {url};
+        document.head.appendChild(script);
+    }}
+    function watch() {{
+        var math = document.querySelectorAll(".math");
+        if (!math.length) {{
+            return;
+        }}
+        if (!("IntersectionObserver" in window)) {{
+            return load();
+        }}
+        var observer = new IntersectionObserver(function (entries) {{
+            for (var i = 0; i < entries.length; i++) {{
+                if (entries[i].isIntersecting) {{
+                    observer.disconnect();
+                    return load();
+                }}
+            }}
+        }}, {{ rootMargin: "200px" }});
+        math.forEach(function (element) {{
+            observer.observe(element);
+        }});
+    }}
+    if (document.readyState === "loading") {{
+        document.addEventListener("DOMContentLoaded", watch);
+    }} else {{
+        watch();
+    }}
+}})();
+</script>"""
+
+# MathJax configuration script of the current build, when the loader is used
+_config_script = None
+
+
+def enable_loader(mathjax_script):
+    """Use the loader for this build (None turns it off)."""
+    global _config_script
+    _config_script = mathjax_script
+
+
+def insert_loader(path, context):
+    """Turn the placeholders of a written page into one loader."""
+    if _config_script is None or not path.endswith(".html"):
+        return
+
+    with open(path, encoding="utf-8") as fd:
+        output = fd.read()
+    first = PLACEHOLDER_SCRIPT.search(output) if PLACEHOLDER in output else None
+    if first is None:
+        return
+
+    siteurl = context.get("SITEURL", "")
+    loader = LOADER_SCRIPT.format(url=json.dumps(f"{siteurl}/{CONFIG_PATH}"))
+    rest = PLACEHOLDER_SCRIPT.sub("", output[first.end() :])
+    with open(path, "w", encoding="utf-8") as fd:
+        # Summaries stripped of their tags, as in meta descriptions, keep
+        # the bare placeholder
+        fd.write(output[: first.start()].replace(PLACEHOLDER, ""))
+        fd.write(loader)
+        fd.write(rest.replace(PLACEHOLDER, ""))
+
+
+def write_config(pelican_obj):
+    """Write the MathJax configuration the loaders fetch."""
+    if _config_script is None:
+        return
+
+    path = os.path.join(pelican_obj.output_path, CONFIG_PATH)
+    mkdir_p(os.path.dirname(path))
+    with open(path, "w", encoding="utf-8") as fd:
+        fd.write(_config_script)
+    logger.debug("Wrote the MathJax configuration to %s", path)
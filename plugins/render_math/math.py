@@ -12,7 +12,13 @@ For ReStructuredText, the plugin instructs the reST engine
 to output Mathjax for all math.
 
 The MathJax script is by default automatically inserted
-into the HTML.
+into the HTML. With the ``prerender`` setting, math in
+Markdown is instead typeset to SVG during the build by a
+local renderer process (see ``prerender.py``), and pages
+whose math was all prerendered do not load MathJax. The
+``loader`` setting replaces the script inlined in every
+content and summary by one small loader per page (see
+``loader.py``).
 
 Typogrify Compatibility
 -----------------------
@@ -32,12 +38,21 @@ import os
 import sys
 
 from pelican import generators, signals
+from pelican.readers import MarkdownReader
 
 try:
     from bs4 import BeautifulSoup
 except ImportError:
     BeautifulSoup = None
 
+try:
+    from ..utils.html_cache import get_soup
+except ImportError:
+    get_soup = None
+
+from .loader import PLACEHOLDER, enable_loader, insert_loader, write_config
+from .prerender import DEFAULT_COMMAND, close_renderer, open_renderer
+
 try:
     from .pelican_mathjax_markdown_extension import PelicanMathJaxExtension
 except ImportError:
@@ -102,6 +117,13 @@ def process_settings(pelicanobj):
         "TeX",
     ]  # Include in order of preference among TeX, STIX-Web, Asana-Math, Neo-Euler, Gyre-Pagella, Gyre-Termes and Latin-Modern
     mathjax_settings["equation_numbering"] = "none"  # AMS, auto, none
+    mathjax_settings["prerender"] = False  # "svg" typesets Markdown math at build time
+    mathjax_settings["prerender_command"] = (
+        DEFAULT_COMMAND  # renderer process used to prerender math
+    )
+    mathjax_settings["loader"] = (
+        False  # if true, pages load MathJax once, when math becomes visible
+    )
 
     # Source for MathJax
     mathjax_settings["source"] = (
@@ -217,33 +239,114 @@ def process_settings(pelicanobj):
         if key == "equation_numbering":
             mathjax_settings[key] = value if value is not None else "none"
 
+        if key == "prerender" and (isinstance(value, bool) or value == "svg"):
+            mathjax_settings[key] = "svg" if value else False
+
+        if key == "prerender_command" and isinstance(value, list):
+            mathjax_settings[key] = value
+
+        if key == "loader" and isinstance(value, bool):
+            mathjax_settings[key] = value
+
     return mathjax_settings
 
 
-def process_summary(article):
-    """Prevent summary truncation. Insert MathJax script so math will be rendered."""
-    summary = article.summary
+def fix_summary_math(summary, get_full_math):
+    """Complete the last formula of a summary if it was cut off.
+
+    Return the corrected summary, or None if the summary holds no math
+    left to MathJax. ``get_full_math(n)`` returns the text of the n-th
+    formula of the content and is only called when it is needed.
+    """
     summary_parsed = BeautifulSoup(summary, "html.parser")
     math = summary_parsed.find_all(class_="math")
 
-    if len(math) > 0:
-        last_math_text = math[-1].get_text()
-        if len(last_math_text) > 3 and last_math_text[-3:] == "...":
-            content_parsed = BeautifulSoup(article._content, "html.parser")
-            full_text = content_parsed.find_all(class_="math")[len(math) - 1].get_text()
-            math[-1].string = "%s ..." % full_text
-            summary = summary_parsed.decode()
+    # Prerendered formulae need neither repair nor the MathJax script
+    if all(element.find("mjx-container") for element in math):
+        return None
 
-        # clear memoization cache
-        import functools
+    last_math_text = math[-1].get_text()
+    if len(last_math_text) > 3 and last_math_text[-3:] == "...":
+        math[-1].string = "%s ..." % get_full_math(len(math) - 1)
+        summary = summary_parsed.decode()
 
-        if isinstance(article.get_summary, functools.partial):
-            memoize_instance = article.get_summary.func.__self__
-            memoize_instance.cache.clear()
+    return summary
 
-        article.metadata["summary"] = (
-            f"{summary}<script type='text/javascript'>{process_summary.mathjax_script}</script>"
-        )
+
+def content_math(get_content_soup):
+    """Return a ``get_full_math`` function that parses the content."""
+
+    def get_full_math(ordinal):
+        return get_content_soup().find_all(class_="math")[ordinal].get_text()
+
+    return get_full_math
+
+
+def index_math(content):
+    """Keep the math index of the Markdown conversion that produced ``content``.
+
+    The index is dropped if it does not match the math of the content, as
+    for content read from the cache or holding math written as raw HTML, and
+    for content not written in Markdown, whose reader did not replace the
+    index of the Markdown file read before.
+    """
+    extension = getattr(index_math, "extension", None)
+    if extension is None:
+        return
+
+    math_index, extension.math_index = extension.math_index, None
+    if math_index is None or content._content is None:
+        return
+    extension_name = os.path.splitext(content.source_path or "")[1][1:]
+    if extension_name not in MarkdownReader.file_extensions:
+        return
+    if content._content.count('class="math"') == len(math_index):
+        content._math_index = math_index
+
+
+def set_summary(article, summary):
+    """Store a corrected summary, followed by the MathJax script.
+
+    Return True if the summary changed.
+    """
+    summary = (
+        f"{summary}<script type='text/javascript'>{process_summary.mathjax_script}</script>"
+    )
+    if article.metadata.get("summary") == summary:
+        return False
+
+    article.metadata["summary"] = summary
+    return True
+
+
+def forget_summaries(articles):
+    """Drop the memoized summaries of ``articles``, and only theirs."""
+    import functools
+
+    articles = set(articles)
+    if not articles:
+        return
+
+    get_summary = next(iter(articles)).get_summary
+    if isinstance(get_summary, functools.partial):
+        cache = get_summary.func.__self__.cache
+        for key in [key for key in cache if key[0] in articles]:
+            del cache[key]
+
+
+def process_summary(article):
+    """Prevent summary truncation. Insert MathJax script so math will be rendered.
+
+    Return True if the summary changed.
+    """
+    math_index = getattr(article, "_math_index", None)
+    if math_index is not None:
+        get_full_math = math_index.__getitem__
+    else:
+        get_full_math = content_math(lambda: get_soup(article))
+
+    summary = fix_summary_math(article.summary, get_full_math)
+    return summary is not None and set_summary(article, summary)
 
 
 def configure_typogrify(pelicanobj, mathjax_settings):
@@ -301,17 +404,24 @@ def mathjax_for_markdown(pelicanobj, mathjax_script, mathjax_settings):
     config["mathjax_script"] = mathjax_script
     config["math_tag_class"] = "math"
     config["auto_insert"] = mathjax_settings["auto_insert"]
+    config["renderer"] = None
+    if mathjax_settings["prerender"]:
+        config["renderer"] = open_renderer(
+            mathjax_settings["prerender_command"], pelicanobj.settings
+        )
 
     # Instantiate markdown extension and append it to the current extensions
     try:
+        extension = PelicanMathJaxExtension(config)
         if isinstance(
             pelicanobj.settings.get("MD_EXTENSIONS"), list
         ):  # pelican 3.6.3 and earlier
-            pelicanobj.settings["MD_EXTENSIONS"].append(PelicanMathJaxExtension(config))
+            pelicanobj.settings["MD_EXTENSIONS"].append(extension)
         else:
             pelicanobj.settings["MARKDOWN"].setdefault("extensions", []).append(
-                PelicanMathJaxExtension(config)
+                extension
             )
+        index_math.extension = extension
     except:  # NOQA: E722
         sys.excepthook(*sys.exc_info())
         sys.stderr.write(
@@ -342,10 +452,17 @@ def pelican_init(pelicanobj):
     # Generate mathjax script
     mathjax_script = process_mathjax_script(mathjax_settings)
 
+    # With the loader, content only holds a placeholder for it
+    enable_loader(None)
+    if mathjax_settings["loader"]:
+        enable_loader(mathjax_script)
+        mathjax_script = PLACEHOLDER
+
     # Configure Typogrify
     configure_typogrify(pelicanobj, mathjax_settings)
 
     # Configure Mathjax For Markdown
+    index_math.extension = None
     if PelicanMathJaxExtension:
         mathjax_for_markdown(pelicanobj, mathjax_script, mathjax_settings)
 
@@ -390,23 +507,33 @@ def process_rst_and_summaries(content_generators):
     Also process summaries if present (only applies to articles)
     and user wants summaries processed (via user settings)
     """
+    articles = []
     for generator in content_generators:
         if isinstance(generator, generators.ArticlesGenerator):
             for article in (
                 generator.articles + generator.translations + generator.drafts
             ):
                 rst_add_mathjax(article)
-                # optionally fix truncated formulae in summaries.
-                if process_summary.mathjax_script is not None:
-                    process_summary(article)
+                articles.append(article)
         elif isinstance(generator, generators.PagesGenerator):
             for page in generator.pages:
                 rst_add_mathjax(page)
             for page in generator.hidden_pages:
                 rst_add_mathjax(page)
 
+    # optionally fix truncated formulae in summaries.
+    if process_summary.mathjax_script is None:
+        return
+
+    changed = [article for article in articles if process_summary(article)]
+    forget_summaries(changed)
+
 
 def register():
     """Register the plugin."""
     signals.initialized.connect(pelican_init)
+    signals.content_object_init.connect(index_math)
     signals.all_generators_finalized.connect(process_rst_and_summaries)
+    signals.content_written.connect(insert_loader)
+    signals.finalized.connect(close_renderer)
+    signals.finalized.connect(write_config)
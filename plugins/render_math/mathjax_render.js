@@ -0,0 +1,70 @@
+// Renderer process of render_math's prerender mode: typesets TeX to SVG
+// with MathJax 3. Requires mathjax-full (npm install mathjax-full).
+//
+// Writes the MathJax version first, {"version": "3.2.2"}, then reads one
+// JSON request per line, {"tex": "...", "display": true}, and answers each
+// with one JSON line, {"html": "..."} or {"error": "..."}.
+"use strict";
+
+const readline = require("readline");
+const { mathjax } = require("mathjax-full/js/mathjax.js");
+
+// Without the stylesheet MathJax adds to pages, display math is laid out
+// with inline styles
+const DISPLAY_STYLE = "display: block; text-align: center; margin: 1em 0";
+
+// The version keys the plugin's equation cache, so it is written before
+// the input and output jax are loaded: a build served from the cache only
+// waits for it
+process.stdout.write(JSON.stringify({ version: mathjax.version }) + "\n");
+
+let adaptor;
+let document;
+
+function createDocument() {
+  const { TeX } = require("mathjax-full/js/input/tex.js");
+  const { SVG } = require("mathjax-full/js/output/svg.js");
+  const { liteAdaptor } = require("mathjax-full/js/adaptors/liteAdaptor.js");
+  const { RegisterHTMLHandler } = require("mathjax-full/js/handlers/html.js");
+  const { AllPackages } = require("mathjax-full/js/input/tex/AllPackages.js");
+
+  adaptor = liteAdaptor();
+  RegisterHTMLHandler(adaptor);
+  return mathjax.document("", {
+    InputJax: new TeX({
+      // Report TeX errors instead of typesetting them, so that the plugin
+      // leaves the formula to MathJax in the browser
+      packages: AllPackages.filter(
+        (name) => name !== "noerrors" && name !== "noundefined"
+      ),
+      formatError: (jax, error) => {
+        throw error;
+      },
+    }),
+    // Each SVG carries the glyphs it uses, as pages share no font cache
+    OutputJax: new SVG({ fontCache: "local" }),
+  });
+}
+
+function render(request) {
+  document = document || createDocument();
+  const node = document.convert(request.tex, { display: request.display });
+  if (request.display) {
+    adaptor.setAttribute(node, "style", DISPLAY_STYLE);
+  }
+  adaptor.setAttribute(node, "role", "img");
+  adaptor.setAttribute(node, "aria-label", request.tex);
+  return adaptor.outerHTML(node);
+}
+
+readline
+  .createInterface({ input: process.stdin, terminal: false })
+  .on("line", (line) => {
+    let answer;
+    try {
+      answer = { html: render(JSON.parse(line)) };
+    } catch (error) {
+      answer = { error: String((error && error.message) || error) };
+    }
+    process.stdout.write(JSON.stringify(answer) + "\n");
+  });
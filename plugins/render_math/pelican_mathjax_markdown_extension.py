@@ -4,33 +4,126 @@ An extension for the Python-Markdown module that enables Pelican to process Math
 This extension enables Pelican to use Mathjax as a first-class citizen.
 """
 
+from abc import ABCMeta, abstractmethod
 from xml.etree.ElementTree import Element
 
 import markdown
 from markdown.util import AtomicString
 
 
-class PelicanMathJaxPattern(markdown.inlinepatterns.Pattern):
-    """Inline markdown processing that matches MathJax."""
+class PelicanMathJaxPattern(
+    markdown.inlinepatterns.InlineProcessor, metaclass=ABCMeta
+):
+    """Inline markdown processing that matches MathJax.
 
-    def __init__(self, pelican_mathjax_extension, tag, pattern):
-        super().__init__(pattern)
+    ``pattern`` only finds the opening delimiters; ``find_math`` scans
+    forward for the closing one with ``str.find``, so long paragraphs full
+    of ``$`` signs are not backtracked over.
+    """
+
+    def __init__(self, pelican_mathjax_extension, tag, pattern, md=None):
+        super().__init__(pattern, md)
         self.math_tag_class = pelican_mathjax_extension.getConfig("math_tag_class")
         self.pelican_mathjax_extension = pelican_mathjax_extension
         self.tag = tag
 
-    def handleMatch(self, m):
+    @abstractmethod
+    def find_math(self, m, data):
+        """Return ``(prefix, math, suffix, end)`` of the math opened at ``m``."""
+
+    def handleMatch(self, m, data):
+        found = self.find_math(m, data)
+        if found is None:
+            return None, None, None
+        prefix, math, suffix, end = found
+
         node = Element(self.tag)
         node.set("class", self.math_tag_class)
 
-        prefix = "\\(" if m.group("prefix") == "$" else m.group("prefix")
-        suffix = "\\)" if m.group("suffix") == "$" else m.group("suffix")
-        node.text = markdown.util.AtomicString(prefix + m.group("math") + suffix)
+        renderer = self.pelican_mathjax_extension.getConfig("renderer")
+        if renderer:
+            if prefix in ("$", "$$"):
+                tex = math
+            else:
+                # Environments are rendered whole
+                tex = prefix + math + suffix
+            rendered = renderer.render(tex, display=self.tag == "div")
+            if rendered is not None:
+                # The markup is stashed so that it is not escaped
+                node.text = AtomicString(self.md.htmlStash.store(rendered))
+                return node, m.start(0), end
+
+        prefix = "\\(" if prefix == "$" else prefix
+        suffix = "\\)" if suffix == "$" else suffix
+        node.text = markdown.util.AtomicString(prefix + math + suffix)
 
         # If mathjax was successfully matched, then JavaScript needs to be added
         # for rendering. The boolean below indicates this
         self.pelican_mathjax_extension.mathjax_needed = True
-        return node
+        return node, m.start(0), end
+
+
+class PelicanMathJaxInlinePattern(PelicanMathJaxPattern):
+    """Match ``$math$``, whose closing ``$`` does not follow whitespace."""
+
+    def __init__(self, pelican_mathjax_extension, md=None):
+        super().__init__(pelican_mathjax_extension, "span", r"\$", md)
+        # Text in which no formula closes after the given position
+        self._unclosed = (None, 0)
+
+    def find_math(self, m, data):
+        start = m.start(0)
+        text, unclosed_from = self._unclosed
+        if data is text and start >= unclosed_from:
+            return None
+
+        close = data.find("$", start + 2)
+        while close != -1 and data[close - 1].isspace():
+            close = data.find("$", close + 1)
+        if close == -1:
+            # Later "$" signs cannot be closed either
+            self._unclosed = (data, start)
+            return None
+        return "$", data[start + 1 : close], "$", close + 1
+
+
+class PelicanMathJaxDisplayPattern(PelicanMathJaxPattern):
+    """Match ``$$math$$`` and ``\\begin{env}math\\end{env}``."""
+
+    def __init__(self, pelican_mathjax_extension, md=None):
+        super().__init__(pelican_mathjax_extension, "div", r"\$\$|\\begin\{", md)
+        # Text in which no "$$" closes after the given position
+        self._unclosed = (None, 0)
+
+    def find_math(self, m, data):
+        start = m.start(0)
+        if m.group(0) == "$$":
+            text, unclosed_from = self._unclosed
+            if data is text and start >= unclosed_from:
+                return None
+
+            close = data.find("$$", start + 3)
+            if close == -1:
+                self._unclosed = (data, start)
+                return None
+            return "$$", data[start + 2 : close], "$$", close + 2
+
+        brace = data.find("}", start + 8)
+        if brace == -1:
+            return None
+        prefix = data[start : brace + 1]
+        # An environment ends at its \end, or at the same \begin
+        suffixes = (prefix, "\\end{%s}" % data[start + 7 : brace])
+        closes = [
+            (close, suffix)
+            for suffix in suffixes
+            for close in [data.find(suffix, brace + 2)]
+            if close != -1
+        ]
+        if not closes:
+            return None
+        close, suffix = min(closes)
+        return prefix, data[brace + 1 : close], suffix, close + len(suffix)
 
 
 class PelicanMathJaxCorrectDisplayMath(markdown.treeprocessors.Treeprocessor):
@@ -39,61 +132,110 @@ class PelicanMathJaxCorrectDisplayMath(markdown.treeprocessors.Treeprocessor):
     def __init__(self, pelican_mathjax_extension):
         self.pelican_mathjax_extension = pelican_mathjax_extension
 
-    def correct_html(self, root, children, div_math, insert_idx, text):
+    def correct_html(self, children, div_math, text):
         """Separate out <div class="math"> from the parent tag <p>.
 
-        Anything in-between is put into its own parent <p> tag.
+        Anything in-between is put into its own parent <p> tag. Return the
+        elements replacing the parent.
         """
+        elements = []
         current_idx = 0
 
-        for idx in div_math:
+        for idx in div_math + [None]:
             el = Element("p")
             el.text = text
             el.extend(children[current_idx:idx])
 
             # Test to ensure that empty <p> is not inserted
             if len(el) != 0 or (el.text and not el.text.isspace()):
-                root.insert(insert_idx, el)
-                insert_idx += 1
+                elements.append(el)
+
+            if idx is None:
+                break
 
             text = children[idx].tail
             children[idx].tail = None
-            root.insert(insert_idx, children[idx])
-            insert_idx += 1
+            elements.append(children[idx])
             current_idx = idx + 1
 
-        el = Element("p")
-        el.text = text
-        el.extend(children[current_idx:])
-
-        if len(el) != 0 or (el.text and not el.text.isspace()):
-            root.insert(insert_idx, el)
+        return elements
 
     def run(self, root):
         """Search for <div class="math"> that are children in <p> tags.
 
-        And correct the invalid HTML that results.
+        And correct the invalid HTML that results. The children of ``root``
+        are rebuilt in one pass, rather than by inserting into ``root``
+        while iterating it.
         """
         math_tag_class = self.pelican_mathjax_extension.getConfig("math_tag_class")
 
+        new_children = []
+        corrected = False
         for parent in root:
-            div_math = []
             children = list(parent)
-
-            for div in parent.findall("div"):
-                if div.get("class") == math_tag_class:
-                    div_math.append(children.index(div))
+            div_math = [
+                idx
+                for idx, child in enumerate(children)
+                if child.tag == "div" and child.get("class") == math_tag_class
+            ]
 
             # Do not process further if no displayed math has been found
             if not div_math:
+                new_children.append(parent)
                 continue
 
-            insert_idx = list(root).index(parent)
-            self.correct_html(root, children, div_math, insert_idx, parent.text)
-            root.remove(
-                parent
-            )  # Parent must be removed last for correct insertion index
+            new_children.extend(self.correct_html(children, div_math, parent.text))
+            corrected = True
+
+        if corrected:
+            root[:] = new_children
+        return root
+
+
+class PelicanMathJaxStartIndex(markdown.preprocessors.Preprocessor):
+    """Scope the math index to the content converted by a Markdown instance.
+
+    Pelican's readers create a Markdown instance per file and convert its
+    content first, then its formatted metadata. The index of a former file
+    is dropped when the content conversion starts, even if that file never
+    reached ``content_object_init``.
+    """
+
+    def __init__(self, pelican_mathjax_extension, md=None):
+        super().__init__(md)
+        self.pelican_mathjax_extension = pelican_mathjax_extension
+        self.content_converted = False
+
+    def run(self, lines):
+        extension = self.pelican_mathjax_extension
+        extension.indexing = not self.content_converted
+        if extension.indexing:
+            self.content_converted = True
+            extension.math_index = None
+        return lines
+
 
+class PelicanMathJaxIndexMath(markdown.treeprocessors.Treeprocessor):
+    """Record the text of the math elements of a document, in order.
+
+    Only the content of a file is recorded, not its formatted metadata.
+    """
+
+    def __init__(self, pelican_mathjax_extension):
+        self.pelican_mathjax_extension = pelican_mathjax_extension
+
+    def run(self, root):
+        if not self.pelican_mathjax_extension.indexing:
+            return root
+
+        self.pelican_mathjax_extension.indexing = False
+        math_tag_class = self.pelican_mathjax_extension.getConfig("math_tag_class")
+        self.pelican_mathjax_extension.math_index = [
+            # Prerendered math only holds a placeholder of its markup
+            "" if markdown.util.STX in element.text else element.text
+            for element in root.iter()
+            if element.get("class") == math_tag_class
+        ]
         return root
 
 
@@ -137,6 +279,11 @@ class PelicanMathJaxExtension(markdown.Extension):
                 True,
                 "Determines if mathjax script is automatically inserted into content",
             ]
+            # Markdown would turn a renderer into a boolean for a None default
+            self.config["renderer"] = [
+                "",
+                "Renderer typesetting math during the build, if any",
+            ]
             super().__init__(**config)
         except AttributeError:
             # Markdown versions < 2.5
@@ -152,32 +299,32 @@ class PelicanMathJaxExtension(markdown.Extension):
                 config["auto_insert"],
                 "Determines if mathjax script is automatically inserted into content",
             ]
+            config["renderer"] = [
+                config.get("renderer", ""),
+                "Renderer typesetting math during the build, if any",
+            ]
             super().__init__(config)
 
         # Used as a flag to determine if javascript
         # needs to be injected into a document
         self.mathjax_needed = False
 
-    def extendMarkdown(self, md):
-        # Regex to detect mathjax
-        mathjax_inline_regex = r"(?P<prefix>\$)(?P<math>.+?)(?P<suffix>(?<!\s)\2)"
-        mathjax_display_regex = (
-            r"(?P<prefix>\$\$|\\begin\{(.+?)\})(?P<math>.+?)(?P<suffix>\2|\\end\{\3\})"
-        )
+        # Text of each math element of the last content converted, so that
+        # summaries can be repaired without parsing the content again
+        self.math_index = None
+        # Whether the conversion running is the content of a file
+        self.indexing = False
 
+    def extendMarkdown(self, md):
         # Process mathjax before escapes are processed since escape processing will
         # interfere with mathjax. The order in which the displayed and inlined math
         # is registered below matters: we should have higher priority than 'escape',
         # which has 180.
         md.inlinePatterns.register(
-            PelicanMathJaxPattern(self, "div", mathjax_display_regex),
-            "mathjax_displayed",
-            186,
+            PelicanMathJaxDisplayPattern(self, md), "mathjax_displayed", 186
         )
         md.inlinePatterns.register(
-            PelicanMathJaxPattern(self, "span", mathjax_inline_regex),
-            "mathjax_inlined",
-            185,
+            PelicanMathJaxInlinePattern(self, md), "mathjax_inlined", 185
         )
 
         # Correct the invalid HTML that results from the displayed math
@@ -186,6 +333,11 @@ class PelicanMathJaxExtension(markdown.Extension):
             PelicanMathJaxCorrectDisplayMath(self), "mathjax_correctdisplayedmath", 15
         )
 
+        md.preprocessors.register(
+            PelicanMathJaxStartIndex(self, md), "mathjax_startindex", 40
+        )
+        md.treeprocessors.register(PelicanMathJaxIndexMath(self), "mathjax_index", 10)
+
         # If necessary, add the JavaScript Mathjax library to the document. This must
         # be last in the ordered dict (hence it is given the position '_end')
         if self.getConfig("auto_insert"):
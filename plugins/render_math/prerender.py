@@ -0,0 +1,227 @@
+"""Build-time typesetting of math for the render_math plugin.
+
+With ``MATH_JAX = {"prerender": "svg"}`` the Markdown extension hands every
+formula to a local renderer process and inlines the markup it returns, so
+readers' browsers have nothing left to typeset. Pages whose math was all
+prerendered no longer get the MathJax script; a formula the renderer
+rejects is left to MathJax in the browser as before.
+
+The renderer is started on the first formula of a build and stopped when
+the build finishes. It first writes the version of its typesetter,
+``{"version": "3.2.2"}``, then reads one JSON request per line::
+
+    {"tex": "a^2 + b^2", "display": false}
+
+and answers each with one JSON line, ``{"html": "..."}`` or
+``{"error": "..."}``. The bundled ``mathjax_render.js`` implements it with
+MathJax 3 (``npm install mathjax-full``); ``prerender_command`` selects
+another program.
+
+Rendered formulae are cached by renderer command, hash of its script,
+typesetter version, display mode and TeX source with its whitespace
+normalized, so a formula repeated across articles is only rendered once,
+and editing the script or upgrading MathJax renders everything again.
+EQUATION_CACHE_SIZE bounds the cache, which is kept in CACHE_PATH across
+builds with CACHE_CONTENT / LOAD_CONTENT_CACHE enabled. A build served
+entirely from it only waits for the renderer to report its version.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import subprocess
+
+from ..utils.disk_cache import BoundedDataCacher, hash_key
+
+logger = logging.getLogger(__name__)
+
+RENDER_SCRIPT = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "mathjax_render.js"
+)
+DEFAULT_COMMAND = ["node", RENDER_SCRIPT]
+EQUATION_CACHE_NAME = "equations"
+EQUATION_CACHE_SIZE = 5000
+
+WHITESPACE = re.compile(r"\s+")
+
+# Renderer of the current build
+_renderer = None
+
+
+def normalize_tex(tex):
+    """Return ``tex`` without insignificant whitespace.
+
+    Runs of whitespace become one space, or one newline if they hold one,
+    as a newline ends a TeX comment.
+    """
+    return WHITESPACE.sub(
+        lambda match: "\n" if "\n" in match.group() else " ", tex.strip()
+    )
+
+
+def script_hash(command):
+    """Return a digest of the script files among the arguments of ``command``."""
+    digest = hashlib.sha1()
+    for argument in command[1:]:
+        if os.path.isfile(argument):
+            with open(argument, "rb") as script:
+                digest.update(script.read())
+    return digest.hexdigest()
+
+
+class MathRenderer:
+    """Client of a renderer process, started on first use."""
+
+    def __init__(self, command, cache=None):
+        self.command = command
+        self.cache = cache
+        self.version = None
+        self._script_hash = None
+        self._process = None
+        self._failed = False
+
+    def render(self, tex, display):
+        """Return the markup of a formula, or None if it was not rendered."""
+        if self.cache is None:
+            return self._render(tex, display)
+
+        # The version is only known once the renderer has started
+        if self._start() is None:
+            return None
+        if self._script_hash is None:
+            self._script_hash = script_hash(self.command)
+        key = hash_key(
+            repr(self.command),
+            self._script_hash,
+            self.version,
+            repr(display),
+            normalize_tex(tex),
+        )
+        html = self.cache.get_cached_data(key)
+        if html is None:
+            html = self._render(tex, display)
+            # Failures are not cached, the renderer may be fixed by next build
+            if html is not None:
+                self.cache.cache_data(key, html)
+        return html
+
+    def _render(self, tex, display):
+        process = self._start()
+        if process is None:
+            return None
+
+        try:
+            process.stdin.write(json.dumps({"tex": tex, "display": display}) + "\n")
+            process.stdin.flush()
+            line = process.stdout.readline()
+        except OSError as err:
+            line = ""
+            logger.debug("Math renderer pipe failed: %s", err)
+        answer = self._read_answer(line, ("html", "error"))
+        if answer is None:
+            return None
+        if "error" in answer:
+            logger.warning("Could not prerender %s\n ... %s", tex, answer["error"])
+            return None
+        return answer["html"]
+
+    def _start(self):
+        if self._process is None and not self._failed:
+            try:
+                self._process = subprocess.Popen(
+                    self.command,
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    text=True,
+                    encoding="utf-8",
+                )
+            except OSError as err:
+                logger.warning(
+                    "Could not start math renderer %s, math is left to MathJax"
+                    "\n ... %s",
+                    self.command,
+                    err,
+                )
+                self._failed = True
+                return None
+
+            try:
+                line = self._process.stdout.readline()
+            except OSError as err:
+                line = ""
+                logger.debug("Math renderer pipe failed: %s", err)
+            answer = self._read_answer(line, ("version",))
+            if answer is not None:
+                self.version = str(answer["version"])
+        return self._process
+
+    def _read_answer(self, line, fields):
+        """Decode a line of the renderer, or stop it if it is not an answer."""
+        if not line:
+            logger.warning(
+                "Math renderer %s exited, math is left to MathJax", self.command
+            )
+        else:
+            try:
+                answer = json.loads(line)
+            except json.JSONDecodeError:
+                answer = None
+            if isinstance(answer, dict) and any(field in answer for field in fields):
+                return answer
+            logger.warning(
+                "Math renderer %s wrote %r instead of an answer, "
+                "math is left to MathJax",
+                self.command,
+                line.rstrip("\n"),
+            )
+        self._failed = True
+        self.close()
+        return None
+
+    def close(self):
+        process, self._process = self._process, None
+        if process is None:
+            return
+        # End of input makes the renderer exit
+        for stream in (process.stdin, process.stdout):
+            try:
+                stream.close()
+            except OSError:
+                pass
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def open_renderer(command, settings):
+    """Return the renderer of this build, replacing the one of a former build."""
+    global _renderer
+    close_renderer()
+    # Shared by the articles of a build even when the cache is not saved
+    cache = BoundedDataCacher(
+        settings,
+        EQUATION_CACHE_NAME,
+        True,
+        settings.get("LOAD_CONTENT_CACHE", False),
+        settings.get("EQUATION_CACHE_SIZE", EQUATION_CACHE_SIZE),
+    )
+    _renderer = MathRenderer(command, cache)
+    return _renderer
+
+
+def close_renderer(*args):
+    """Stop the renderer process and save its cache (connected to ``finalized``)."""
+    global _renderer
+    if _renderer is None:
+        return
+
+    _renderer.close()
+    cache = _renderer.cache
+    if cache.settings.get("CACHE_CONTENT", False):
+        cache.save_cache()
+    logger.debug("Equation cache: %d hits, %d misses", cache.hits, cache.misses)
+    _renderer = None
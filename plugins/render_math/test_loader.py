@@ -0,0 +1,34 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+from . import loader
+from .loader import PLACEHOLDER, enable_loader, insert_loader
+
+
+class LoaderTest(unittest.TestCase):
+    def test_placeholders_become_one_loader(self):
+        enable_loader("MathJax.Hub.Config({});")
+        self.addCleanup(enable_loader, None)
+        page = (
+            f"<p>one</p><script type='text/javascript'>{PLACEHOLDER}</script>"
+            f'<p>two</p><script type="text/javascript">{PLACEHOLDER}</script>'
+            "<p>three</p>"
+        )
+        with TemporaryDirectory() as tmpdirname:
+            path = os.path.join(tmpdirname, "index.html")
+            with open(path, "w", encoding="utf-8") as fd:
+                fd.write(page)
+            insert_loader(path, {"SITEURL": "https://example.com"})
+            with open(path, encoding="utf-8") as fd:
+                output = fd.read()
+
+        self.assertNotIn(PLACEHOLDER, output)
+        self.assertEqual(output.count("<script"), 1)
+        self.assertTrue(output.startswith("<p>one</p><script"))
+        self.assertTrue(output.endswith("</script><p>two</p><p>three</p>"))
+        self.assertIn(f'"https://example.com/{loader.CONFIG_PATH}"', output)
+
+
+if __name__ == "__main__":
+    unittest.main()
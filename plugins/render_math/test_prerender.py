@@ -0,0 +1,131 @@
+import os
+import sys
+import unittest
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+import markdown
+
+from . import prerender
+from .pelican_mathjax_markdown_extension import PelicanMathJaxExtension
+from .prerender import MathRenderer, close_renderer, normalize_tex, open_renderer
+
+# Stands in for mathjax_render.js: wraps the TeX in a tag and rejects "\bad"
+FAKE_RENDERER = r"""
+import json, os, sys
+print(json.dumps({"version": os.environ.get("FAKE_MATHJAX_VERSION", "3.2.2")}))
+sys.stdout.flush()
+for line in sys.stdin:
+    request = json.loads(line)
+    if "\\bad" in request["tex"]:
+        answer = {"error": "Undefined control sequence"}
+    else:
+        tag = "mjx-container display" if request["display"] else "mjx-container"
+        answer = {"html": "<%s>%s</mjx-container>" % (tag, request["tex"])}
+    print(json.dumps(answer), flush=True)
+"""
+
+
+class PrerenderTest(unittest.TestCase):
+    def convert(self, renderer, source):
+        extension = PelicanMathJaxExtension(
+            {
+                "mathjax_script": "loadMathJax()",
+                "math_tag_class": "math",
+                "auto_insert": True,
+                "renderer": renderer,
+            }
+        )
+        return markdown.markdown(source, extensions=[extension])
+
+    def test_prerendered_pages_do_not_load_mathjax(self):
+        renderer = MathRenderer([sys.executable, "-c", FAKE_RENDERER])
+        self.addCleanup(renderer.close)
+
+        html = self.convert(renderer, "Let $a < b$.\n\n$$u_{tt} = u_{xx}$$")
+        self.assertIn('<span class="math"><mjx-container>a < b</mjx-container>', html)
+        self.assertIn(
+            '<div class="math"><mjx-container display>u_{tt} = u_{xx}', html
+        )
+        self.assertNotIn("loadMathJax", html)
+
+        html = self.convert(renderer, "Let $\\bad$ and $b$.")
+        self.assertIn('<span class="math">\\(\\bad\\)</span>', html)
+        self.assertIn("loadMathJax", html)
+
+    def test_missing_renderer_leaves_math_to_mathjax(self):
+        renderer = MathRenderer(["/nonexistent/renderer"])
+        with self.assertLogs("plugins.render_math.prerender", "WARNING"):
+            html = self.convert(renderer, "Let $a$.")
+        self.assertIn('<span class="math">\\(a\\)</span>', html)
+        self.assertIn("loadMathJax", html)
+
+    def test_renderer_writing_other_output_leaves_math_to_mathjax(self):
+        renderer = MathRenderer([sys.executable, "-c", "print('Warning: slow')"])
+        self.addCleanup(renderer.close)
+        with self.assertLogs("plugins.render_math.prerender", "WARNING"):
+            html = self.convert(renderer, "Let $a$ and $b$.")
+        self.assertIn('<span class="math">\\(b\\)</span>', html)
+        self.assertIn("loadMathJax", html)
+        self.assertIsNone(renderer._process)
+
+    def test_equations_are_rendered_once_across_builds(self):
+        with TemporaryDirectory() as tmpdirname:
+            settings = {
+                "CACHE_PATH": tmpdirname,
+                "GZIP_CACHE": True,
+                "CACHE_CONTENT": True,
+                "LOAD_CONTENT_CACHE": True,
+            }
+            command = [sys.executable, "-c", FAKE_RENDERER]
+            renderer = open_renderer(command, settings)
+            first = renderer.render("u_{tt}  = u_{xx}", True)
+            self.assertEqual(renderer.render("u_{tt} = u_{xx} ", True), first)
+            self.assertEqual((renderer.cache.hits, renderer.cache.misses), (1, 1))
+            with self.assertLogs(prerender.logger, "DEBUG"):
+                close_renderer()
+
+            renderer = open_renderer(command, settings)
+            self.assertEqual(
+                renderer.render("u_{tt} = u_{xx}", True),
+                "<mjx-container display>u_{tt}  = u_{xx}</mjx-container>",
+            )
+            # Served from the cache of the former build
+            self.assertEqual((renderer.cache.hits, renderer.cache.misses), (1, 0))
+            close_renderer()
+
+    def test_new_renderer_version_or_script_renders_again(self):
+        with TemporaryDirectory() as tmpdirname:
+            settings = {
+                "CACHE_PATH": tmpdirname,
+                "GZIP_CACHE": True,
+                "CACHE_CONTENT": True,
+                "LOAD_CONTENT_CACHE": True,
+            }
+            script = os.path.join(tmpdirname, "renderer.py")
+            with open(script, "w") as f:
+                f.write(FAKE_RENDERER)
+            command = [sys.executable, script]
+
+            def misses():
+                renderer = open_renderer(command, settings)
+                renderer.render("a^2", False)
+                misses = renderer.cache.misses
+                close_renderer()
+                return misses
+
+            self.assertEqual(misses(), 1)
+            self.assertEqual(misses(), 0)
+            with mock.patch.dict(os.environ, {"FAKE_MATHJAX_VERSION": "4.0.0"}):
+                self.assertEqual(misses(), 1)
+
+            with open(script, "a") as f:
+                f.write("# edited\n")
+            self.assertEqual(misses(), 1)
+
+    def test_normalize_tex_keeps_line_breaks(self):
+        self.assertEqual(normalize_tex(" a  +\tb % c\n  + d "), "a + b % c\n+ d")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,13 +1,22 @@
 from os.path import dirname, join
 from tempfile import TemporaryDirectory
 
+import markdown
 from pelican import Pelican
+from pelican.contents import Article
 from pelican.generators import ArticlesGenerator
 from pelican.settings import configure_settings
 from pelican.tests.support import get_settings, unittest
 from pelican.writers import Writer
 
-from .math import pelican_init, process_rst_and_summaries
+from .math import (
+    forget_summaries,
+    index_math,
+    pelican_init,
+    process_rst_and_summaries,
+    process_summary,
+)
+from .pelican_mathjax_markdown_extension import PelicanMathJaxExtension
 
 CUR_DIR = dirname(__file__)
 
@@ -37,6 +46,75 @@ class RenderMathTest(unittest.TestCase):
                     self.assertIn("mathjaxscript_pelican", article.content)
             generator.generate_output(Writer(tmpdirname, settings=settings))
 
+    def test_math_delimiters(self):
+        extension = PelicanMathJaxExtension(
+            {"mathjax_script": "", "math_tag_class": "math", "auto_insert": False}
+        )
+        html = markdown.markdown(
+            "Pay $5 or $ 6 for $a_1 $b$.\n\n"
+            "$$u_{tt} = c^2 u_{xx}$$\n\n"
+            "\\begin{align}x &= 1\\end{align}",
+            extensions=[extension],
+        )
+        self.assertEqual(
+            html,
+            '<p>Pay <span class="math">\\(5 or $ 6 for $a_1 $b\\)</span>.</p>\n'
+            '<div class="math">$$u_{tt} = c^2 u_{xx}$$</div>\n'
+            '<div class="math">\\begin{align}x &amp;= 1\\end{align}</div>',
+        )
+
+    def test_summary_is_repaired_from_the_math_index(self):
+        process_summary.mathjax_script = "loadMathJax()"
+        self.addCleanup(setattr, process_summary, "mathjax_script", None)
+        summary = '<p>Let <span class="math">\\(a + ...</span></p>'
+        articles = [
+            Article("", metadata={"title": title, "summary": summary})
+            for title in ("first", "second")
+        ]
+        article, other = articles
+        # The content is not parsed when the article has a math index
+        article._content = None
+        article._math_index = ["\\(a + b\\)"]
+        other_summary = other.summary
+
+        self.assertTrue(process_summary(article))
+        self.assertEqual(article.summary, summary)
+        forget_summaries([article])
+        self.assertEqual(
+            article.summary,
+            '<p>Let <span class="math">\\(a + b\\) ...</span></p>'
+            "<script type='text/javascript'>loadMathJax()</script>",
+        )
+        self.assertIs(other.summary, other_summary)
+
+    def test_math_index_belongs_to_the_last_content_converted(self):
+        extension = PelicanMathJaxExtension(
+            {"mathjax_script": "", "math_tag_class": "math", "auto_insert": False}
+        )
+        index_math.extension = extension
+        self.addCleanup(setattr, index_math, "extension", None)
+
+        def read(source):
+            # As MarkdownReader does: content first, then formatted metadata
+            md = markdown.Markdown(extensions=["meta", extension])
+            content = md.convert(source)
+            md.reset()
+            md.convert("Summary with $s$")
+            return content
+
+        # A file whose reader failed after converting it: no content is
+        # created for it and its index is not consumed
+        read("Other $x^2$ post")
+        content = read("Let $a + b$ hold")
+        article = Article(content, metadata={"title": "t"}, source_path="a.md")
+        index_math(article)
+        self.assertEqual(article._math_index, ["\\(a + b\\)"])
+
+        read("Other $x^2$ post")
+        page = Article(content, metadata={"title": "t"}, source_path="a.rst")
+        index_math(page)
+        self.assertFalse(hasattr(page, "_math_index"))
+
 
 def _build_article_generator(settings, output_path):
     context = settings.copy()
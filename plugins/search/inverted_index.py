@@ -0,0 +1,107 @@
+"""Sharded JSON inverted index for the search plugin.
+
+A pure-Python alternative to Stork. The index is split by term prefix into
+small JSON files so that the browser only downloads the shards a query
+needs::
+
+    search-index/meta.json         documents and the shard of each prefix
+    search-index/shards/<key>.json {term: [[document, frequency], ...]}
+"""
+
+import json
+import logging
+import re
+import shutil
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from bs4 import BeautifulSoup
+
+logger = logging.getLogger(__name__)
+
+INDEX_DIR = "search-index"
+INDEX_VERSION = 1
+EXCERPT_LENGTH = 160
+
+TERM = re.compile(r"\w+")
+WHITESPACE = re.compile(r"\s+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase search terms."""
+    return TERM.findall(text.lower())
+
+
+def extract_text(path: Path, html_selector: str) -> str:
+    """Return the searchable text of a file, as Stork would index it."""
+    try:
+        source = path.read_text(encoding="utf-8")
+    except OSError as err:
+        logger.warning("Search plugin could not read %s\n ... %s", path, err)
+        return ""
+
+    if path.suffix not in (".html", ".htm"):
+        return source
+
+    soup = BeautifulSoup(source, "html.parser")
+    return " ".join(element.get_text(" ") for element in soup.select(html_selector))
+
+
+def build_inverted_index(
+    input_files: List[Dict], base_directory: str, html_selector: str
+) -> Tuple[List[List[str]], Dict[str, List[List[int]]]]:
+    """Return the documents and the postings of every term.
+
+    Documents are ``[url, title, excerpt]`` lists and postings map a term to
+    ``[document, frequency]`` pairs.
+    """
+    documents = []
+    postings = defaultdict(list)
+    for input_file in input_files:
+        text = extract_text(Path(base_directory) / input_file["path"], html_selector)
+        title = input_file["title"].replace('\\"', '"')
+        excerpt = WHITESPACE.sub(" ", text).strip()[:EXCERPT_LENGTH]
+
+        document = len(documents)
+        documents.append([input_file["url"], title, excerpt])
+        for term, frequency in Counter(tokenize(f"{title} {text}")).items():
+            postings[term].append([document, frequency])
+
+    return documents, postings
+
+
+def write_sharded_index(
+    documents: List[List[str]],
+    postings: Dict[str, List[List[int]]],
+    output_path: str,
+    prefix_length: int,
+):
+    """Write the index as one JSON shard per term prefix."""
+    shards = defaultdict(dict)
+    for term, term_postings in postings.items():
+        shards[term[:prefix_length]][term] = term_postings
+
+    index_path = Path(output_path) / INDEX_DIR
+    # Drop the shards of prefixes that no longer exist
+    shutil.rmtree(index_path, ignore_errors=True)
+    (index_path / "shards").mkdir(parents=True)
+
+    shard_files = {}
+    for prefix, terms in sorted(shards.items()):
+        # Hex keeps file names and URLs safe for any alphabet
+        key = prefix.encode("utf-8").hex()
+        with (index_path / "shards" / f"{key}.json").open("w", encoding="utf-8") as fd:
+            json.dump(terms, fd, ensure_ascii=False, separators=(",", ":"))
+        shard_files[prefix] = key
+
+    meta = {
+        "version": INDEX_VERSION,
+        "prefix_length": prefix_length,
+        "documents": documents,
+        "shards": shard_files,
+    }
+    with (index_path / "meta.json").open("w", encoding="utf-8") as fd:
+        json.dump(meta, fd, ensure_ascii=False, separators=(",", ":"))
+
+    return len(shard_files)
@@ -3,18 +3,115 @@
 Copyright (c) Justin Mayer
 """
 
+import atexit
+import hashlib
+import json
 import logging
 import subprocess
+import threading
+import time
+from functools import lru_cache, partial
+from itertools import chain
 from pathlib import Path
 from shutil import which
-from typing import Dict, List
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import rtoml
 from jinja2.filters import do_striptags as striptags
 from pelican import signals
+from pelican.utils import mkdir_p
+
+from ..utils.disk_cache import hash_key
+from .inverted_index import INDEX_DIR, build_inverted_index, write_sharded_index
 
 logger = logging.getLogger(__name__)
 
+# Bump when the manifest layout changes so that older manifests are ignored
+MANIFEST_VERSION = 1
+
+INDEXERS = ("stork", "json")
+
+# Titles seen across rebuilds, as a livereload session reuses the process
+TITLE_CACHE_SIZE = 16384
+
+
+# Stork builds still running in the background, joined on `finalized` and
+# stopped if the run fails before it
+_running_builds: List["StorkBuild"] = []
+
+
+@lru_cache(maxsize=TITLE_CACHE_SIZE)
+def index_title(title: str) -> str:
+    """Strip the markup of a title and escape its double-quotation marks."""
+    return striptags(title).replace('"', '\\"')
+
+
+class StorkBuild:
+    """A ``stork build`` run in the background while Pelican writes output.
+
+    Its output is forwarded to the log line by line as Stork prints it.
+    """
+
+    def __init__(
+        self,
+        command: List[str],
+        timeout: Optional[float] = None,
+        on_success: Optional[Callable[[], None]] = None,
+    ):
+        self.timeout = timeout
+        self.on_success = on_success
+        self.output = []
+        self.started = time.monotonic()
+        self.process = subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            encoding="utf-8",
+        )
+        self.reader = threading.Thread(target=self._forward_output, daemon=True)
+        self.reader.start()
+
+    def _forward_output(self):
+        for line in self.process.stdout:
+            line = line.rstrip()
+            self.output.append(line)
+            log = logger.error if "error" in line else logger.debug
+            log("Search plugin reported %s", line)
+
+    def join(self) -> str:
+        """Wait for the build and return its output."""
+        try:
+            returncode = self.process.wait(timeout=self.timeout)
+        except subprocess.TimeoutExpired as e:
+            self.process.kill()
+            self.process.wait()
+            # Do not wait on the output of children that outlive Stork
+            self.reader.join(timeout=1)
+            raise Exception(
+                f"Search plugin reported Stork did not finish within {self.timeout}s"
+            ) from e
+        self.reader.join()
+
+        output = "\n".join(self.output)
+        if returncode:
+            raise Exception("".join(["Search plugin reported ", output]))
+
+        logger.debug(
+            "Search plugin built the search index in %.2fs",
+            time.monotonic() - self.started,
+        )
+        if self.on_success is not None:
+            self.on_success()
+        return output
+
+    def stop(self):
+        """Kill the build if it is still running, discarding its index."""
+        if self.process.poll() is None:
+            self.process.kill()
+            logger.debug("Search plugin stopped an unfinished Stork build")
+        self.process.wait()
+        self.reader.join(timeout=1)
+
 
 class SearchSettingsGenerator:
     """Generate site search settings."""
@@ -26,6 +123,15 @@ class SearchSettingsGenerator:
         self.tpages = settings.get("TEMPLATE_PAGES")
         self.input_options = settings.get("STORK_INPUT_OPTIONS", {})
         self.output_options = settings.get("STORK_OUTPUT_OPTIONS")
+        self.incremental = settings.get("STORK_INCREMENTAL", True)
+        self.manifest_path = Path(settings.get("CACHE_PATH", "cache")) / (
+            "search-manifest.json"
+        )
+        self.build_timeout = settings.get("STORK_BUILD_TIMEOUT", 600)
+        self.indexer = self.get_indexer(settings.get("SEARCH_INDEXER"))
+        self.shard_prefix_length = settings.get("SEARCH_SHARD_PREFIX_LENGTH", 2)
+        # Let templates load the matching search client
+        self.context["SEARCH_INDEXER"] = self.indexer
         # Set default values
         self.input_options.setdefault("html_selector", "main")
         self.input_options.setdefault("base_directory", self.output_path)
@@ -50,86 +156,231 @@ class SearchSettingsGenerator:
             if settings.get("SEARCH_MODE") == "source":
                 self.input_options["base_directory"] = self.content
 
+    @staticmethod
+    def get_indexer(indexer):
+        """Return the indexer to use, preferring Stork when it is installed."""
+        if indexer is None:
+            if which("stork"):
+                return "stork"
+            logger.warning(
+                "Stork is not available on $PATH, "
+                "the search plugin falls back to its JSON index."
+            )
+            return "json"
+        if indexer not in INDEXERS:
+            raise ValueError(
+                f"SEARCH_INDEXER must be one of {', '.join(INDEXERS)}, not {indexer!r}"
+            )
+        return indexer
+
     def generate_output(self, writer):
         search_settings_path = Path(self.output_path) / "search.toml"
 
-        self.generate_stork_settings(search_settings_path)
+        indexed = list(self.get_indexed_files())
+        input_files = [input_file for input_file, _ in indexed]
+        manifest = self.get_manifest(indexed)
 
-        # Build the search index
-        build_log = self.build_search_index(search_settings_path)
-        build_log = "".join(["Search plugin reported ", build_log])
-        logger.error(build_log) if "error" in build_log else logger.debug(build_log)
+        # Skip indexing when no indexed page changed since the last build
+        if self.incremental and self.is_index_current(manifest):
+            logger.debug("Search plugin reported the search index is up to date")
+            return
 
-    def build_search_index(self, search_settings_path: Path):
-        if not which("stork"):
-            raise Exception("Stork must be installed and available on $PATH.")
+        if self.indexer == "json":
+            self.build_json_index(input_files)
+            if self.incremental:
+                self.save_manifest(manifest)
+            return
+
+        self.generate_stork_settings(search_settings_path, input_files)
+
+        # Builds left over from a run that failed before `finalized`
+        stop_search_builds()
+
+        # Index in the background while the remaining generators write output
+        on_success = partial(self.save_manifest, manifest) if self.incremental else None
+        _running_builds.append(
+            self.start_search_index(search_settings_path, on_success)
+        )
+
+    def get_manifest(self, indexed: List[Tuple[Dict, str]]) -> Dict:
+        """Describe everything the search index is built from."""
+        options = dict(self.input_options)
+        options.pop("files", None)
+        config = json.dumps(
+            {
+                "indexer": self.indexer,
+                "input": options,
+                "output": self.output_options,
+                "shard_prefix_length": self.shard_prefix_length,
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return {
+            "version": MANIFEST_VERSION,
+            "config": hash_key(config),
+            "files": {
+                input_file["path"]: hash_key(
+                    input_file["url"], input_file["title"], fingerprint
+                )
+                for input_file, fingerprint in indexed
+            },
+        }
+
+    def is_index_current(self, manifest: Dict) -> bool:
+        """Return True if the last index was built from the same manifest."""
+        if not self.index_path.exists():
+            return False
         try:
-            output = subprocess.run(
-                [
-                    "stork",
-                    "build",
-                    "--input",
-                    str(search_settings_path),
-                    "--output",
-                    f"{self.output_path}/search-index.st",
-                ],
-                capture_output=True,
-                encoding="utf-8",
-                check=True,
+            with self.manifest_path.open(encoding="utf-8") as fd:
+                previous = json.load(fd)
+        except (OSError, ValueError):
+            return False
+
+        if previous == manifest:
+            return True
+
+        files = previous.get("files", {})
+        changed = sum(
+            files.get(path) != digest for path, digest in manifest["files"].items()
+        )
+        logger.debug(
+            "Search plugin reported %d changed and %d removed indexed files",
+            changed,
+            len(files.keys() - manifest["files"].keys()),
+        )
+        return False
+
+    def save_manifest(self, manifest: Dict):
+        try:
+            mkdir_p(str(self.manifest_path.parent))
+            with self.manifest_path.open("w", encoding="utf-8") as fd:
+                json.dump(manifest, fd)
+        except OSError as err:
+            logger.warning(
+                "Could not save search manifest %s\n ... %s", self.manifest_path, err
             )
-        except subprocess.CalledProcessError as e:
-            error_output = "".join(["Search plugin reported ", e.stdout, e.stderr])
-            raise Exception(error_output) from e
 
-        return output.stdout
+    @property
+    def index_path(self) -> Path:
+        if self.indexer == "json":
+            return Path(self.output_path) / INDEX_DIR / "meta.json"
+        return Path(self.output_path) / "search-index.st"
 
-    def generate_stork_settings(self, search_settings_path: Path):
-        self.input_options["files"] = self.get_input_files()
+    def build_json_index(self, input_files: List[Dict]):
+        documents, postings = build_inverted_index(
+            input_files,
+            self.input_options["base_directory"],
+            self.input_options["html_selector"],
+        )
+        shards = write_sharded_index(
+            documents, postings, self.output_path, self.shard_prefix_length
+        )
+        logger.debug(
+            "Search plugin reported %d documents, %d terms in %d shards",
+            len(documents),
+            len(postings),
+            shards,
+        )
 
-        search_settings = {"input": self.input_options}
+    def start_search_index(
+        self,
+        search_settings_path: Path,
+        on_success: Optional[Callable[[], None]] = None,
+    ) -> StorkBuild:
+        if not which("stork"):
+            raise Exception("Stork must be installed and available on $PATH.")
+        return StorkBuild(
+            [
+                "stork",
+                "build",
+                "--input",
+                str(search_settings_path),
+                "--output",
+                f"{self.output_path}/search-index.st",
+            ],
+            timeout=self.build_timeout,
+            on_success=on_success,
+        )
 
-        if self.output_options:
-            search_settings["output"] = self.output_options
+    def build_search_index(self, search_settings_path: Path) -> str:
+        return self.start_search_index(search_settings_path).join()
 
-        # Write the search settings file to disk
+    def generate_stork_settings(
+        self, search_settings_path: Path, input_files: Iterable[Dict] = None
+    ):
+        if input_files is None:
+            input_files = self.get_input_files()
+        input_options = {
+            key: value for key, value in self.input_options.items() if key != "files"
+        }
+
+        # Write the search settings file to disk, one input file at a time
         with search_settings_path.open("w", encoding="utf-8") as fd:
-            rtoml.dump(obj=search_settings, file=fd)
+            fd.write(rtoml.dumps({"input": input_options}))
+            for input_file in input_files:
+                fd.write("\n[[input.files]]\n")
+                fd.write(rtoml.dumps(input_file))
+            if self.output_options:
+                fd.write("\n")
+                fd.write(rtoml.dumps({"output": self.output_options}))
 
     def _index_output(self) -> bool:
         return self.input_options["base_directory"] == self.output_path
 
     def get_input_files(
         self,
-    ) -> List[Dict]:
-        pages = self.context["pages"] + self.context["articles"]
+    ) -> Iterator[Dict]:
+        return (input_file for input_file, _ in self.get_indexed_files())
+
+    def get_indexed_files(self) -> Iterator[Tuple[Dict, str]]:
+        """Yield each file to index with a fingerprint of its indexed text.
 
-        for article in self.context["articles"]:
-            pages += article.translations
+        The fingerprint of articles and pages is their content, so that
+        template or theme changes alone do not invalidate the index. Pages
+        saved to the same output file are only indexed once.
+        """
+        articles = self.context["articles"]
+        pages = chain(
+            self.context["pages"],
+            articles,
+            chain.from_iterable(article.translations for article in articles),
+        )
+        index_output = self._index_output()
+        seen = set()
 
-        input_files = []
         # Generate list of articles and pages to index
         for page in pages:
-            page_to_index = (
-                page.save_as if self._index_output() else page.relative_source_path
-            )
-            # Escape double-quotation marks in the title
-            title = striptags(page.title).replace('"', '\\"')
-            input_files.append(
-                {
-                    "path": page_to_index,
-                    "url": f"/{page.url}",
-                    "title": f"{title}",
-                }
-            )
+            if page.save_as in seen:
+                continue
+            seen.add(page.save_as)
+            page_to_index = page.save_as if index_output else page.relative_source_path
+            input_file = {
+                "path": page_to_index,
+                "url": f"/{page.url}",
+                "title": index_title(page.title),
+            }
+            yield input_file, hash_key(page._content or "")
 
         # Generate list of *template* pages to index (if any)
-        for tpage in self.tpages:
-            tpage_to_index = self.tpages[tpage] if self._index_output() else tpage
-            input_files.append(
-                {"path": tpage_to_index, "url": self.tpages[tpage], "title": ""}
-            )
+        for tpage, save_as in self.tpages.items():
+            if save_as in seen:
+                continue
+            seen.add(save_as)
+            tpage_to_index = save_as if index_output else tpage
+            input_file = {
+                "path": tpage_to_index,
+                "url": save_as,
+                "title": "",
+            }
+            yield input_file, self._file_digest(tpage_to_index)
 
-        return input_files
+    def _file_digest(self, path: str) -> str:
+        try:
+            data = (Path(self.input_options["base_directory"]) / path).read_bytes()
+        except OSError:
+            return ""
+        return hashlib.sha1(data).hexdigest()
 
 
 def get_generators(generators):
@@ -137,6 +388,24 @@ def get_generators(generators):
     return SearchSettingsGenerator
 
 
+def join_search_builds(pelican):
+    """Wait for the Stork builds started during this run."""
+    while _running_builds:
+        _running_builds.pop(0).join()
+
+
+def stop_search_builds():
+    """Stop the Stork builds of a run that did not reach `finalized`."""
+    while _running_builds:
+        _running_builds.pop(0).stop()
+
+
+# A generator or writer raising skips `finalized`. Registered once, as
+# `register` runs again on every autoreload cycle
+atexit.register(stop_search_builds)
+
+
 def register():
     """Register the plugin."""
     signals.get_generators.connect(get_generators)
+    signals.finalized.connect(join_search_builds)
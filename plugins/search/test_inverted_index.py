@@ -0,0 +1,47 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from .inverted_index import INDEX_DIR, build_inverted_index, write_sharded_index
+
+
+class InvertedIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = Path(self.directory.name)
+        (self.path / "a.html").write_text(
+            "<nav>menu</nav><main><p>Prime numbers and primes</p></main>",
+            encoding="utf-8",
+        )
+        (self.path / "b.html").write_text(
+            "<main><p>Numbers, numbers</p></main>", encoding="utf-8"
+        )
+        self.input_files = [
+            {"path": "a.html", "url": "/a.html", "title": 'A \\"quoted\\" title'},
+            {"path": "b.html", "url": "/b.html", "title": "B"},
+        ]
+
+    def test_postings_follow_the_selector(self):
+        documents, postings = build_inverted_index(
+            self.input_files, self.directory.name, "main"
+        )
+        self.assertEqual(documents[0][:2], ["/a.html", 'A "quoted" title'])
+        self.assertEqual(postings["numbers"], [[0, 1], [1, 2]])
+        self.assertEqual(postings["prime"], [[0, 1]])
+        self.assertNotIn("menu", postings)
+
+    def test_shards_split_terms_by_prefix(self):
+        documents, postings = build_inverted_index(
+            self.input_files, self.directory.name, "main"
+        )
+        self.assertEqual(write_sharded_index(documents, postings, self.path, 2), 7)
+
+        index_path = self.path / INDEX_DIR
+        meta = json.loads((index_path / "meta.json").read_text(encoding="utf-8"))
+        shard = index_path / "shards" / f"{meta['shards']['pr']}.json"
+        self.assertEqual(
+            json.loads(shard.read_text(encoding="utf-8")),
+            {"prime": [[0, 1]], "primes": [[0, 1]]},
+        )
@@ -0,0 +1,84 @@
+"""Microbenchmark of the statistics engine on the longest articles.
+
+Times ``text_stats`` and the whole ``text_statistics`` pass against the
+original implementations, kept in ``reference``, reports their peak
+memory and checks that both produce the same numbers.
+
+Run from the repository root::
+
+    python -m plugins.statistics.benchmark_readability [ARTICLE_COUNT]
+"""
+
+import sys
+import timeit
+import tracemalloc
+from pathlib import Path
+
+import markdown
+from bs4 import BeautifulSoup
+
+from .readability import flesch_index, flesch_kincaid_level, syllables, text_stats
+from .reference import reference_text_statistics, reference_text_stats
+from .statistics import text_statistics
+
+ARTICLES_DIR = Path("content") / "articles"
+REPEAT = 5
+
+
+def longest_articles(count):
+    """Return ``(name, visible text)`` of the ``count`` longest articles."""
+    paths = sorted(ARTICLES_DIR.glob("*.md"), key=lambda p: p.stat().st_size)
+    articles = []
+    for path in reversed(paths[-count:]):
+        html = markdown.markdown(path.read_text(encoding="utf-8"))
+        articles.append((path.name, BeautifulSoup(html, "html.parser").getText()))
+    return articles
+
+
+def best_time(func, *args, repeat=REPEAT):
+    """Return the best of ``repeat`` runs of ``func(*args)``, in milliseconds."""
+    return min(timeit.repeat(lambda: func(*args), number=1, repeat=repeat)) * 1000
+
+
+def peak_memory(func, *args):
+    """Return the peak memory allocated while running ``func(*args)``, in KiB."""
+    tracemalloc.start()
+    func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def main(count=5):
+    for name, text in longest_articles(count):
+        expected = reference_text_stats(text, 0)
+        stats = text_stats(text, 0)
+        assert stats == expected, (name, stats, expected)
+        assert flesch_index(stats) == flesch_index(expected)
+        assert flesch_kincaid_level(stats) == flesch_kincaid_level(expected)
+
+        word_count, readability = reference_text_statistics(text)
+        statistics = text_statistics(text)
+        assert statistics["word_counts"] == word_count, name
+        assert statistics["fi"] == f"{flesch_index(readability):.2f}", name
+        assert statistics["fk"] == f"{flesch_kincaid_level(readability):.2f}", name
+
+        # Start from a cold memo table for a fair comparison
+        syllables.cache_clear()
+        cold = best_time(text_stats, text, 0, repeat=1)
+        before = best_time(reference_text_stats, text, 0)
+        print(
+            f"{name}: {len(text)} chars\n"
+            f"  text_stats: reference {before:.2f} ms, "
+            f"engine {cold:.2f} ms cold / "
+            f"{best_time(text_stats, text, 0):.2f} ms warm\n"
+            f"  statistics: reference "
+            f"{best_time(reference_text_statistics, text):.2f} ms "
+            f"{peak_memory(reference_text_statistics, text):.0f} KiB peak, "
+            f"engine {best_time(text_statistics, text):.2f} ms "
+            f"{peak_memory(text_statistics, text):.0f} KiB peak"
+        )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
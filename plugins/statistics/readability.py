@@ -5,9 +5,22 @@ See here for details: http://en.wikipedia.org/wiki/Flesch%E2%80%93Kincaid_readab
 """
 
 import re
+from collections import Counter
+from functools import lru_cache
 
 SYLLABLES_MIN_WORD_COUNT = 3
 TEXT_STATS_MIN_WORD_COUNT = 2
+# Distinct words whose syllable count is remembered across posts
+SYLLABLES_CACHE_SIZE = 65536
+
+SILENT_SUFFIX = re.compile(r"(es|ed|(?<!l)e)$")
+VOWEL_GROUPS = re.compile(r"[aeiouy]+")
+
+TERMINATORS = re.escape(".!?:;")
+NON_TEXT = re.compile(rf"[^{TERMINATORS}\sA-Za-z]+")
+# A sentence ends at its first terminator; the whitespace and terminators
+# that follow belong to the same break.
+SENTENCE_END = re.compile(rf"[{TERMINATORS}][\s{TERMINATORS}]*")
 
 
 def mean(seq):
@@ -15,35 +28,61 @@ def mean(seq):
     return sum(seq) / len(seq)
 
 
+@lru_cache(maxsize=SYLLABLES_CACHE_SIZE)
 def syllables(word):
     """Return the number of syllables in a word."""
     if len(word) <= SYLLABLES_MIN_WORD_COUNT:
         return 1
 
-    word = re.sub(r"(es|ed|(?<!l)e)$", "", word)
-    return len(re.findall(r"[aeiouy]+", word))
+    word = SILENT_SUFFIX.sub("", word)
+    return len(VOWEL_GROUPS.findall(word))
 
 
 def normalize(text):
     """Normalize a text for readability."""
-    terminators = ".!?:;"
-    term = re.escape(terminators)
-    text = re.sub(rf"[^{term}\sA-Za-z]+", "", text)
+    term = TERMINATORS
+    text = NON_TEXT.sub("", text)
     text = re.sub(rf"\s*([{term}]+\s*)+", ". ", text)
     return re.sub(r"\s+", " ", text)
 
 
 def text_stats(text, wc):
-    """Text stats."""
-    text = normalize(text)
-    stcs = [s.split(" ") for s in text.split(". ")]
-    stcs = [s for s in stcs if len(s) >= TEXT_STATS_MIN_WORD_COUNT]
-
-    words = wc if wc else sum(len(s) for s in stcs)
-
-    sbls = sum(syllables(w) for s in stcs for w in s)
-
-    return len(stcs), words, sbls
+    """Text stats.
+
+    Gives the sentences and words of ``normalize(text)``, but cuts them
+    straight out of the text in a single split. Syllables are only computed
+    once per distinct word.
+    """
+    sentences = SENTENCE_END.split(NON_TEXT.sub("", text))
+    last = len(sentences) - 1
+
+    stcs = 0
+    total = 0
+    # normalize() leaves an empty word where the text starts or ends with
+    # whitespace, and each of them counts as one syllable
+    empty_words = 0
+    word_counts = Counter()
+    for i, sentence in enumerate(sentences):
+        if i != last:
+            # whitespace before a terminator is part of the sentence break
+            sentence = sentence.rstrip()
+        sentence_words = sentence.split()
+        count = len(sentence_words) + int(sentence[:1].isspace())
+        if i == last:
+            count += int(sentence[-1:].isspace())
+        if count < TEXT_STATS_MIN_WORD_COUNT:
+            continue
+
+        stcs += 1
+        total += count
+        empty_words += count - len(sentence_words)
+        word_counts.update(sentence_words)
+
+    words = wc if wc else total
+
+    sbls = empty_words + sum(syllables(w) * n for w, n in word_counts.items())
+
+    return stcs, words, sbls
 
 
 def flesch_index(stats):
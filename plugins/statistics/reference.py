@@ -0,0 +1,44 @@
+"""Original implementations of the statistics engine.
+
+Kept as the reference the tests and ``benchmark_readability`` check the
+current engine against.
+"""
+
+import re
+from collections import Counter
+
+from .readability import SYLLABLES_MIN_WORD_COUNT, TEXT_STATS_MIN_WORD_COUNT, normalize
+
+
+def reference_syllables(word):
+    """Syllable count as originally computed."""
+    if len(word) <= SYLLABLES_MIN_WORD_COUNT:
+        return 1
+
+    word = re.sub(r"(es|ed|(?<!l)e)$", "", word)
+    return len(re.findall(r"[aeiouy]+", word))
+
+
+def reference_text_stats(text, wc):
+    """Text stats as originally computed."""
+    text = normalize(text)
+    stcs = [s.split(" ") for s in text.split(". ")]
+    stcs = [s for s in stcs if len(s) >= TEXT_STATS_MIN_WORD_COUNT]
+
+    words = wc if wc else sum(len(s) for s in stcs)
+
+    sbls = sum(reference_syllables(w) for s in stcs for w in s)
+
+    return len(stcs), words, sbls
+
+
+def reference_text_statistics(raw_text):
+    """Word count and readability of a post as originally computed."""
+    raw_text = raw_text.replace("&nbsp;", " ")
+    raw_text = re.sub(r"\&\#?.+?;", "", raw_text)
+    tmp = raw_text
+    drop = ".,?!@#$%^&*()_+-=\\|/[]{}`~:;'\"‘’—…“”"  # noqa: RUF001
+    raw_text = raw_text.translate({ord(c): "" for c in drop})
+    word_count = Counter(raw_text.lower().split())
+    wc = sum(word_count.values())
+    return word_count, reference_text_stats(tmp, wc)
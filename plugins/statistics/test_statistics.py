@@ -0,0 +1,37 @@
+import unittest
+
+from .readability import text_stats
+from .reference import reference_text_statistics, reference_text_stats
+from .statistics import text_statistics
+
+SAMPLES = [
+    "",
+    " ",
+    "word",
+    " leading space",
+    "trailing space ",
+    "Sentence one. Sentence two!  And three?",
+    "e.g. it's 2025; x1y and ... ok",
+    "  . starts with a break",
+    "ends with a break .",
+    "Non-ASCII — “quotes” and naïve words: déjà vu.",
+    "&nbsp;entities&#39; and &amp; stuff\n\nnew paragraph",
+]
+
+
+class StatisticsTest(unittest.TestCase):
+    def test_text_stats_matches_normalized_split(self):
+        for text in SAMPLES:
+            for wc in (0, 7):
+                with self.subTest(text=text, wc=wc):
+                    self.assertEqual(
+                        text_stats(text, wc), reference_text_stats(text, wc)
+                    )
+
+    def test_word_counts_match_original_tokenizer(self):
+        for text in SAMPLES:
+            with self.subTest(text=text):
+                word_count, _ = reference_text_statistics(text)
+                stats = text_statistics(text)
+                self.assertEqual(stats["word_counts"], word_count)
+                self.assertEqual(stats["wc"], sum(word_count.values()))
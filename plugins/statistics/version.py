@@ -0,0 +1,2 @@
+# Part of the statistics cache key: bump whenever the computed values change.
+__version__ = "1.1.0"
@@ -0,0 +1 @@
+"""Helpers shared by the site's plugins. Not a Pelican plugin itself."""
@@ -0,0 +1,67 @@
+"""Size-bounded persistent caches for plugin results.
+
+Built on Pelican's own ``FileDataCacher``, so the caches live in
+``CACHE_PATH``, honour ``GZIP_CACHE`` and follow the same policies as the
+content cache (``CACHE_CONTENT`` to save, ``LOAD_CONTENT_CACHE`` to load).
+"""
+
+import hashlib
+from itertools import islice
+
+from pelican.cache import FileDataCacher
+
+
+def hash_key(*parts):
+    """Return a stable cache key for the given strings."""
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class BoundedDataCacher(FileDataCacher):
+    """Cache keeping only the ``max_entries`` most recently used entries."""
+
+    def __init__(self, settings, cache_name, caching_policy, load_policy, max_entries):
+        super().__init__(settings, cache_name, caching_policy, load_policy)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def for_content(cls, settings, cache_name, max_entries):
+        """Open a cache that follows the content caching settings."""
+        return cls(
+            settings,
+            cache_name,
+            settings.get("CACHE_CONTENT", False),
+            settings.get("LOAD_CONTENT_CACHE", False),
+            max_entries,
+        )
+
+    def cache_data(self, key, data):
+        """Cache data for the given key as the most recently used entry."""
+        if self._cache_data_policy:
+            self._cache.pop(key, None)
+            self._cache[key] = data
+
+    def get_cached_data(self, key, default=None):
+        """Get cached data for the given key and mark it as recently used."""
+        try:
+            data = self._cache.pop(key)
+        except KeyError:
+            self.misses += 1
+            return default
+
+        self._cache[key] = data
+        self.hits += 1
+        return data
+
+    def save_cache(self):
+        """Evict the least recently used entries, then save the cache."""
+        excess = len(self._cache) - self.max_entries
+        if excess > 0:
+            for key in list(islice(self._cache, excess)):
+                del self._cache[key]
+        super().save_cache()
@@ -0,0 +1,249 @@
+"""Concurrent feed fetching with a persistent HTTP cache.
+
+Parsed feeds are kept in ``CACHE_PATH`` together with their ``ETag`` and
+``Last-Modified`` headers. A feed fetched less than ``FEED_CACHE_TTL``
+seconds ago is not requested again, an older one is revalidated with a
+conditional request, and a feed that cannot be fetched falls back to its
+cached copy, so builds keep working offline.
+
+With ``FEED_BACKGROUND_REFRESH`` (used by ``invoke livereload``) builds never
+wait on the network: they read the last snapshot of each feed, and a daemon
+thread revalidates stale feeds every ``FEED_REFRESH_INTERVAL`` seconds, or
+as soon as a build asks for a stale or unknown feed.
+
+Plugins declare the feeds they read with ``add_feed_source``, and
+``prefetch_feeds`` (connected to ``initialized``) fetches all of them in a
+single concurrent round before any plugin loads its feeds.
+"""
+
+import logging
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from pelican.cache import FileDataCacher
+
+logger = logging.getLogger(__name__)
+
+FEED_CACHE_NAME = "feeds"
+FEED_CACHE_TTL = 3600
+FEED_TIMEOUT = 10
+FEED_REFRESH_INTERVAL = 300
+MAX_WORKERS = 8
+USER_AGENT = "Mozilla/5.0 (compatible; pelican feed fetcher)"
+
+# Background refresher shared by the builds of a livereload session
+_refresher = None
+
+# Functions returning the URLs of the feeds a plugin reads, from settings
+_feed_sources = []
+
+# The settings of the current build and the cache entries prefetched for it
+_prefetched = (None, {})
+
+
+def open_feed_cache(settings):
+    """Open the feed cache, which is always loaded and saved."""
+    return FileDataCacher(settings, FEED_CACHE_NAME, True, True)
+
+
+def add_feed_source(get_urls):
+    """Declare the feeds a plugin reads, as a function of the settings."""
+    if get_urls not in _feed_sources:
+        _feed_sources.append(get_urls)
+
+
+def prefetch_feeds(pelican_obj):
+    """Fetch the feeds of every declared source in one round."""
+    global _prefetched
+    settings = pelican_obj.settings
+    urls = list(
+        dict.fromkeys(url for get_urls in _feed_sources for url in get_urls(settings))
+    )
+    _prefetched = (settings, load_entries(urls, settings) if urls else {})
+
+
+def load_entries(urls, settings):
+    """Return the cache entry of every URL, as fresh as the settings allow."""
+    if settings.get("FEED_BACKGROUND_REFRESH", False):
+        return get_refresher(settings).snapshot(urls)
+    return refresh_feeds(urls, settings)
+
+
+def fetch_feeds(urls, settings):
+    """Return the parsed feed of every URL, fetching stale feeds concurrently.
+
+    Feeds prefetched for this build are not requested again.
+    """
+    import feedparser
+
+    urls = list(dict.fromkeys(urls))
+    prefetched_settings, entries = _prefetched
+    entries = dict(entries) if prefetched_settings is settings else {}
+    missing = [url for url in urls if url not in entries]
+    if missing:
+        entries.update(load_entries(missing, settings))
+    entries = {url: entries[url] for url in urls}
+    return {
+        url: entry["feed"] if entry is not None else feedparser.parse(b"")
+        for url, entry in entries.items()
+    }
+
+
+def refresh_feeds(urls, settings):
+    """Return the cache entry of every URL after fetching the stale ones."""
+    cache = open_feed_cache(settings)
+    entries = {url: cache.get_cached_data(url, None) for url in urls}
+    stale = stale_urls(entries, settings.get("FEED_CACHE_TTL", FEED_CACHE_TTL))
+
+    if stale:
+        timeout = settings.get("FEED_TIMEOUT", FEED_TIMEOUT)
+        with ThreadPoolExecutor(max_workers=min(len(stale), MAX_WORKERS)) as pool:
+            fetched = pool.map(
+                lambda url: fetch_feed(url, entries[url], timeout), stale
+            )
+            for url, entry in zip(stale, fetched):
+                if entry is not None:
+                    entries[url] = entry
+                    cache.cache_data(url, entry)
+        cache.save_cache()
+
+    logger.debug(
+        "Requested %d of %d feeds, the others were fresh in the cache",
+        len(stale),
+        len(urls),
+    )
+    return entries
+
+
+def stale_urls(entries, ttl):
+    """Return the URLs never fetched or fetched at least ``ttl`` seconds ago."""
+    now = time.time()
+    return [
+        url
+        for url, entry in entries.items()
+        if entry is None or now - entry["fetched"] >= ttl
+    ]
+
+
+def get_refresher(settings):
+    """Return the running background refresher, starting it on first use."""
+    global _refresher
+    if _refresher is None:
+        _refresher = FeedRefresher(settings)
+        _refresher.start()
+    return _refresher
+
+
+class FeedRefresher:
+    """Keep feeds warm in a daemon thread (stale-while-revalidate).
+
+    Builds only read the in-memory snapshot, seeded from the feed cache;
+    the thread fetches the stale feeds and saves them back to the cache.
+    """
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.ttl = settings.get("FEED_CACHE_TTL", FEED_CACHE_TTL)
+        self.interval = settings.get("FEED_REFRESH_INTERVAL", FEED_REFRESH_INTERVAL)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._entries = {}
+        self._urls = set()
+        self._thread = threading.Thread(
+            target=self._run, name="feed-refresher", daemon=True
+        )
+
+    def start(self):
+        self._thread.start()
+
+    def snapshot(self, urls):
+        """Return the last known entry of every URL without blocking.
+
+        Stale or unknown feeds are revalidated in the background, for the
+        next build to pick up.
+        """
+        with self._lock:
+            self._urls.update(urls)
+            missing = [url for url in urls if url not in self._entries]
+            if missing:
+                cache = open_feed_cache(self.settings)
+                for url in missing:
+                    self._entries[url] = cache.get_cached_data(url, None)
+            entries = {url: self._entries[url] for url in urls}
+        if stale_urls(entries, self.ttl):
+            self._wakeup.set()
+        return entries
+
+    def refresh(self):
+        """Fetch the stale feeds and publish them to the snapshot."""
+        with self._lock:
+            entries = {url: self._entries.get(url) for url in self._urls}
+        if not stale_urls(entries, self.ttl):
+            return
+
+        entries = refresh_feeds(list(entries), self.settings)
+        with self._lock:
+            self._entries.update(
+                (url, entry) for url, entry in entries.items() if entry is not None
+            )
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(timeout=self.interval)
+            self._wakeup.clear()
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Background feed refresh failed")
+
+
+def fetch_feed(url, cached=None, timeout=FEED_TIMEOUT):
+    """Fetch and parse one feed, revalidating the ``cached`` entry if any.
+
+    Return the new cache entry, or ``cached`` when the feed could not be
+    fetched.
+    """
+    import feedparser
+
+    headers = {"User-Agent": USER_AGENT}
+    if cached is not None:
+        if cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        if cached["modified"]:
+            headers["If-Modified-Since"] = cached["modified"]
+
+    try:
+        with urllib.request.urlopen(
+            urllib.request.Request(url, headers=headers), timeout=timeout
+        ) as response:
+            data = response.read()
+            response_headers = response.headers
+    except urllib.error.HTTPError as err:
+        if err.code == 304 and cached is not None:
+            return dict(cached, fetched=time.time())
+        error = err
+    except (OSError, ValueError) as err:
+        error = err
+    else:
+        feed = feedparser.parse(
+            data,
+            response_headers={
+                "content-location": url,
+                "content-type": response_headers.get("Content-Type", ""),
+            },
+        )
+        return {
+            "feed": feed,
+            "etag": response_headers.get("ETag"),
+            "modified": response_headers.get("Last-Modified"),
+            "fetched": time.time(),
+        }
+
+    if cached is not None:
+        logger.warning("Could not fetch %s, using the cached feed\n ... %s", url, error)
+    else:
+        logger.warning("Could not fetch %s\n ... %s", url, error)
+    return cached
@@ -0,0 +1,79 @@
+"""Shared parsed-HTML documents for content objects.
+
+The summary, statistics, extract_toc and render_math plugins all need a
+BeautifulSoup view of the same ``_content``. Parsing is the main per-article
+cost of a build, so the tree is built once per content object and handed to
+every caller until ``_content`` is actually changed.
+
+The tree is shared. A caller that mutates it must publish the result with
+``set_content`` so that ``_content`` and the cached tree stay in sync;
+otherwise it must call ``forget`` before returning.
+"""
+
+import weakref
+
+from bs4 import BeautifulSoup
+
+# Keyed weakly by content object so that the trees are released together
+# with the articles and never end up in Pelican's pickled content cache.
+_documents = weakref.WeakKeyDictionary()
+
+
+class _Document:
+    """A parsed ``_content`` string and the views derived from it."""
+
+    __slots__ = ("content", "_soup", "_text")
+
+    def __init__(self, content, soup=None):
+        self.content = content
+        self._soup = soup
+        self._text = None
+
+    @property
+    def soup(self):
+        if self._soup is None:
+            self._soup = BeautifulSoup(self.content, "html.parser")
+        return self._soup
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = self.soup.getText()
+        return self._text
+
+
+def _get_document(instance):
+    content = instance._content
+    document = _documents.get(instance)
+    if document is not None and document.content is not content:
+        if document.content == content:
+            # Same markup in a new string object, keep the tree.
+            document.content = content
+        else:
+            document = None
+    if document is None:
+        document = _Document(content)
+        _documents[instance] = document
+    return document
+
+
+def get_soup(instance):
+    """Return the shared BeautifulSoup tree of ``instance._content``."""
+    return _get_document(instance).soup
+
+
+def get_text(instance):
+    """Return the visible text of ``instance._content``."""
+    return _get_document(instance).text
+
+
+def set_content(instance, soup):
+    """Store a modified tree as the new ``_content`` of ``instance``."""
+    content = soup.decode()
+    instance._content = content
+    _documents[instance] = _Document(content, soup)
+
+
+def forget(instance):
+    """Drop the cached tree of ``instance``."""
+    _documents.pop(instance, None)
@@ -0,0 +1,25 @@
+import unittest
+from tempfile import TemporaryDirectory
+
+from .disk_cache import BoundedDataCacher, hash_key
+
+
+class BoundedDataCacherTest(unittest.TestCase):
+    def test_least_recently_used_entries_are_evicted(self):
+        with TemporaryDirectory() as tmpdirname:
+            settings = {"CACHE_PATH": tmpdirname, "GZIP_CACHE": True}
+            cache = BoundedDataCacher(settings, "test", True, False, 2)
+            cache.cache_data("a", 1)
+            cache.cache_data("b", 2)
+            cache.cache_data("c", 3)
+            self.assertEqual(cache.get_cached_data("a"), 1)
+            cache.save_cache()
+
+            cache = BoundedDataCacher(settings, "test", True, True, 2)
+            self.assertIsNone(cache.get_cached_data("b"))
+            self.assertEqual(cache.get_cached_data("a"), 1)
+            self.assertEqual(cache.get_cached_data("c"), 3)
+            self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+    def test_hash_key_separates_parts(self):
+        self.assertNotEqual(hash_key("ab", "c"), hash_key("a", "bc"))
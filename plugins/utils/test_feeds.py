@@ -0,0 +1,112 @@
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+from unittest import mock
+
+from . import feeds
+from .feeds import FeedRefresher, fetch_feeds
+
+FEED = b"""<?xml version="1.0"?>
+<rss version="2.0"><channel><title>Shelf</title>
+<item><title>A book</title><link>https://example.com/a</link></item>
+</channel></rss>"""
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        self.requests.append(self.headers.get("If-None-Match"))
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/rss+xml")
+        self.send_header("ETag", '"v1"')
+        self.end_headers()
+        self.wfile.write(FEED)
+
+    def log_message(self, *args):
+        pass
+
+
+class FetchFeedsTest(unittest.TestCase):
+    def setUp(self):
+        FeedHandler.requests = []
+        self.server = HTTPServer(("127.0.0.1", 0), FeedHandler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/feed"
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.cache_dir = TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+
+    def settings(self, ttl):
+        return {
+            "CACHE_PATH": self.cache_dir.name,
+            "GZIP_CACHE": True,
+            "FEED_CACHE_TTL": ttl,
+            "FEED_TIMEOUT": 2,
+        }
+
+    def fetch(self, ttl):
+        return fetch_feeds([self.url], self.settings(ttl))[self.url]
+
+    def test_fresh_revalidated_and_offline_fetches(self):
+        self.assertEqual(self.fetch(3600)["entries"][0].title, "A book")
+        self.assertEqual(self.fetch(3600)["entries"][0].title, "A book")
+        self.assertEqual(FeedHandler.requests, [None])
+
+        self.assertEqual(self.fetch(0)["entries"][0].title, "A book")
+        self.assertEqual(FeedHandler.requests, [None, '"v1"'])
+
+        self.server.shutdown()
+        self.server.server_close()
+        with self.assertLogs("plugins.utils.feeds", "WARNING"):
+            self.assertEqual(self.fetch(0)["entries"][0].title, "A book")
+
+    def test_unreachable_feed_without_cache_is_empty(self):
+        self.server.shutdown()
+        self.server.server_close()
+        with self.assertLogs("plugins.utils.feeds", "WARNING"):
+            self.assertEqual(self.fetch(3600)["entries"], [])
+
+    def test_refresher_serves_snapshots_without_blocking(self):
+        refresher = FeedRefresher(self.settings(3600))
+        self.assertEqual(refresher.snapshot([self.url]), {self.url: None})
+        self.assertEqual(FeedHandler.requests, [])
+
+        refresher.refresh()
+        entry = refresher.snapshot([self.url])[self.url]
+        self.assertEqual(entry["feed"]["entries"][0].title, "A book")
+        refresher.refresh()
+        self.assertEqual(FeedHandler.requests, [None])
+
+        # A new session starts from the feeds saved by the last one
+        refresher = FeedRefresher(self.settings(3600))
+        self.assertEqual(refresher.snapshot([self.url])[self.url]["etag"], '"v1"')
+
+    def test_prefetched_feeds_are_fetched_in_one_round(self):
+        quotes_url = self.url + "?quotes"
+        sources = [lambda settings: [self.url], lambda settings: [quotes_url]]
+        for get_urls in sources:
+            feeds.add_feed_source(get_urls)
+            self.addCleanup(feeds._feed_sources.remove, get_urls)
+        self.addCleanup(setattr, feeds, "_prefetched", (None, {}))
+
+        settings = self.settings(0)
+        rounds = []
+        refresh_feeds = feeds.refresh_feeds
+        with mock.patch.object(
+            feeds,
+            "refresh_feeds",
+            lambda urls, settings: rounds.append(urls) or refresh_feeds(urls, settings),
+        ):
+            feeds.prefetch_feeds(SimpleNamespace(settings=settings))
+            for url in (self.url, quotes_url):
+                feed = fetch_feeds([url], settings)[url]
+                self.assertEqual(feed["entries"][0].title, "A book")
+        self.assertEqual(rounds, [[self.url, quotes_url]])
@@ -0,0 +1,37 @@
+import unittest
+
+from .html_cache import forget, get_soup, get_text, set_content
+
+
+class ContentMock:
+    """Dummy class exposing the only attribute needed."""
+
+    def __init__(self, content):
+        self._content = content
+
+
+class HtmlCacheTest(unittest.TestCase):
+    def test_tree_is_shared_until_content_changes(self):
+        article = ContentMock("<p>Hello <b>world</b></p>")
+        soup = get_soup(article)
+        self.assertIs(get_soup(article), soup)
+        self.assertEqual(get_text(article), "Hello world")
+
+        # an equal string in a new object keeps the tree
+        article._content = "".join(["<p>Hello ", "<b>world</b></p>"])
+        self.assertIs(get_soup(article), soup)
+
+        article._content = "<p>Bye</p>"
+        self.assertIsNot(get_soup(article), soup)
+        self.assertEqual(get_text(article), "Bye")
+
+    def test_set_content_publishes_modified_tree(self):
+        article = ContentMock("<div>a</div><p>b</p>")
+        soup = get_soup(article)
+        soup.div.extract()
+        set_content(article, soup)
+        self.assertEqual(article._content, "<p>b</p>")
+        self.assertIs(get_soup(article), soup)
+
+        forget(article)
+        self.assertIsNot(get_soup(article), soup)
@@ -98,7 +98,10 @@ def livereload(c):
     from livereload import Server
 
     def cached_build():
-        cmd = "-s {settings_base} -e CACHE_CONTENT=true LOAD_CONTENT_CACHE=true"
+        cmd = (
+            "-s {settings_base} -e CACHE_CONTENT=true LOAD_CONTENT_CACHE=true"
+            " FEED_BACKGROUND_REFRESH=true"
+        )
         pelican_run(cmd.format(**CONFIG))
 
     cached_build()
@@ -0,0 +1,39 @@
+(function () {
+  // Collapsible code blocks built with CODE_COLLAPSIBLE_LAZY hold an empty
+  // body; the highlighted code is fetched the first time they are opened.
+  function loadFragment(details) {
+    var body = details.querySelector(".code-fragment-body");
+    if (!body || details.getAttribute("data-code-fragment-state")) return;
+
+    details.setAttribute("data-code-fragment-state", "loading");
+    fetch(details.getAttribute("data-code-fragment"))
+      .then(function (response) {
+        if (!response.ok) {
+          throw new Error("Failed to load code: " + response.status);
+        }
+        return response.text();
+      })
+      .then(function (html) {
+        body.innerHTML = html;
+        details.setAttribute("data-code-fragment-state", "loaded");
+      })
+      .catch(function (error) {
+        console.error(error);
+        body.textContent = "Could not load the code, reopen to retry.";
+        // Let the next toggle try again
+        details.removeAttribute("data-code-fragment-state");
+      });
+  }
+
+  // "toggle" does not bubble, so listen in the capture phase
+  document.addEventListener(
+    "toggle",
+    function (event) {
+      var details = event.target;
+      if (details.open && details.hasAttribute("data-code-fragment")) {
+        loadFragment(details);
+      }
+    },
+    true
+  );
+})();
@@ -0,0 +1,170 @@
+(function (global) {
+    "use strict";
+
+    // Client for the sharded JSON index written by the search plugin when
+    // Stork is not used. Only the shards of the typed terms are fetched.
+
+    var helpers = global.searchHelpers;
+    var escapeHtml = helpers.escapeHtml;
+    var syncHeading = helpers.syncHeading;
+    var updateQueryString = helpers.updateQueryString;
+
+    // Same terms as the plugin's tokenizer: lowercase runs of word characters
+    function tokenize(text) {
+        return text.toLowerCase().match(/[\p{L}\p{N}_]+/gu) || [];
+    }
+
+    function prefixOf(term, length) {
+        return Array.from(term).slice(0, length).join('');
+    }
+
+    function ShardedIndex(indexUrl) {
+        this.indexUrl = indexUrl.replace(/\/?$/, '/');
+        this.requests = {};
+        this.meta = this.fetchJson('meta.json');
+    }
+
+    ShardedIndex.prototype.fetchJson = function (path) {
+        if (!this.requests[path]) {
+            this.requests[path] = fetch(this.indexUrl + path).then(function (response) {
+                if (!response.ok) {
+                    throw new Error('Failed to load ' + path + ': ' + response.status);
+                }
+                return response.json();
+            });
+        }
+        return this.requests[path];
+    };
+
+    // Load the shards that can hold terms starting with `term`
+    ShardedIndex.prototype.shardsFor = function (meta, term) {
+        var prefix = prefixOf(term, meta.prefix_length);
+        var complete = Array.from(term).length >= meta.prefix_length;
+        var self = this;
+        var keys = Object.keys(meta.shards).filter(function (shardPrefix) {
+            return complete ? shardPrefix === prefix : shardPrefix.indexOf(term) === 0;
+        });
+        return Promise.all(keys.map(function (shardPrefix) {
+            return self.fetchJson('shards/' + meta.shards[shardPrefix] + '.json');
+        }));
+    };
+
+    // Score each document by tf-idf over the terms matching `term` as a prefix
+    ShardedIndex.prototype.scoreTerm = function (meta, term) {
+        var documentCount = meta.documents.length;
+        return this.shardsFor(meta, term).then(function (shards) {
+            var scores = {};
+            shards.forEach(function (shard) {
+                Object.keys(shard).forEach(function (indexedTerm) {
+                    if (indexedTerm.indexOf(term) !== 0) {
+                        return;
+                    }
+                    var postings = shard[indexedTerm];
+                    var idf = Math.log(1 + documentCount / postings.length);
+                    postings.forEach(function (posting) {
+                        scores[posting[0]] = (scores[posting[0]] || 0) + posting[1] * idf;
+                    });
+                });
+            });
+            return scores;
+        });
+    };
+
+    ShardedIndex.prototype.search = function (query) {
+        var self = this;
+        var terms = tokenize(query);
+        return this.meta.then(function (meta) {
+            if (!terms.length) {
+                return [];
+            }
+            return Promise.all(terms.map(function (term) {
+                return self.scoreTerm(meta, term);
+            })).then(function (termScores) {
+                // Every term of the query must match
+                return Object.keys(termScores[0]).filter(function (document) {
+                    return termScores.every(function (scores) {
+                        return document in scores;
+                    });
+                }).map(function (document) {
+                    var score = termScores.reduce(function (total, scores) {
+                        return total + scores[document];
+                    }, 0);
+                    var entry = meta.documents[document];
+                    return { url: entry[0], title: entry[1], excerpt: entry[2], score: score };
+                }).sort(function (a, b) {
+                    return b.score - a.score;
+                });
+            });
+        });
+    };
+
+    function renderResults(output, results, siteUrl) {
+        if (!results.length) {
+            output.innerHTML = '<p class="lunr-result-fail">No results found.</p>';
+            return;
+        }
+        output.innerHTML = results.map(function (result) {
+            return '<div class="lunr-search-result-item">' +
+                '<h4><a href="' + escapeHtml(siteUrl + result.url) + '">' +
+                escapeHtml(result.title) + '</a></h4>' +
+                '<p class="lunr-search-result-item-body">' + escapeHtml(result.excerpt) + '&hellip;</p>' +
+                '</div>';
+        }).join('');
+    }
+
+    function initializeShardedSearch(config) {
+        var indexName = config.index || 'site-search';
+        var inputSelector = config.inputSelector || "[data-stork='" + indexName + "']";
+        var resultSelector = config.outputSelector || "[data-stork='" + indexName + "-output']";
+        var headingSelector = config.headingSelector || '#lunr-search-result-heading';
+        var queryParam = config.queryParam || 'q';
+        var siteUrl = config.siteUrl || '';
+
+        var input = document.querySelector(inputSelector);
+        var output = document.querySelector(resultSelector);
+
+        if (!input || !output) {
+            return Promise.resolve();
+        }
+
+        var index = new ShardedIndex(config.indexUrl || 'search-index/');
+        var latestQuery = 0;
+
+        function run(term) {
+            var query = ++latestQuery;
+            syncHeading(headingSelector, term);
+            updateQueryString(queryParam, term);
+            if (!term) {
+                output.innerHTML = '';
+                return Promise.resolve();
+            }
+            return index.search(term).then(function (results) {
+                // Ignore answers to queries the user has typed past
+                if (query === latestQuery) {
+                    renderResults(output, results, siteUrl);
+                }
+            });
+        }
+
+        input.addEventListener('input', function () {
+            run(input.value.trim()).catch(function (error) {
+                console.error('Search failed.', error);
+            });
+        });
+
+        var form = input.form;
+        if (form) {
+            form.addEventListener('submit', function (event) {
+                event.preventDefault();
+                run(input.value.trim());
+            });
+        }
+
+        var params = new URLSearchParams(global.location.search);
+        var initialTerm = (params.get(queryParam) || '').trim();
+        input.value = initialTerm;
+        return run(initialTerm);
+    }
+
+    global.initializeShardedSearch = initializeShardedSearch;
+})(window);
@@ -1,51 +1,9 @@
 (function (global) {
     "use strict";
 
-    function escapeHtml(value) {
-        return value.replace(/[&<>"']/g, function (character) {
-            return {
-                "&": "&amp;",
-                "<": "&lt;",
-                ">": "&gt;",
-                '"': "&quot;",
-                "'": "&#39;"
-            }[character];
-        });
-    }
-
-    function syncHeading(selector, term) {
-        var heading = document.querySelector(selector);
-        if (!heading) {
-            return;
-        }
-
-        var message = heading.querySelector('[data-stork-current-term]');
-        var trimmed = term.trim();
-
-        if (trimmed) {
-            if (!message) {
-                message = document.createElement('p');
-                message.setAttribute('data-stork-current-term', '');
-                heading.appendChild(message);
-            }
-            message.innerHTML = 'Showing matches for <code>' + escapeHtml(trimmed) + '</code>';
-        } else if (message) {
-            heading.removeChild(message);
-        }
-    }
-
-    function updateQueryString(param, value) {
-        if (!global.history || !global.history.replaceState) {
-            return;
-        }
-        var url = new URL(global.location.href);
-        if (value) {
-            url.searchParams.set(param, value);
-        } else {
-            url.searchParams.delete(param);
-        }
-        global.history.replaceState({}, '', url);
-    }
+    var helpers = global.searchHelpers;
+    var syncHeading = helpers.syncHeading;
+    var updateQueryString = helpers.updateQueryString;
 
     function triggerInput(element) {
         if (!element) {